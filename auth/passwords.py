@@ -0,0 +1,133 @@
+"""bcrypt hashing on a dedicated process pool.
+
+bcrypt is CPU bound and deliberately slow, so the async handlers hand it to
+worker processes instead of running it on the event loop or in the database
+executor. A semaphore bounds the number of in-flight hashes; callers that
+cannot get a slot within PASSWORD_HASH_QUEUE_TIMEOUT seconds get a 503.
+"""
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, TypeVar, Union
+from fastapi import HTTPException, status
+from core.config import settings
+from core.logging import get_logger
+from core.metrics import registry
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# bcrypt only reads this many bytes of a password; bcrypt 5 rejects longer ones
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+password_hash_seconds = registry.histogram(
+    "password_hash_seconds", "bcrypt work including time queued for a worker", ("operation",)
+)
+password_hash_rejections_total = registry.counter(
+    "password_hash_rejections_total", "bcrypt calls rejected because the pool was saturated"
+)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    """Hash a password using bcrypt"""
+    import bcrypt
+
+    salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+def verify_password(password: str, hashed: str) -> bool:
+    """Verify a password against its hash"""
+    import bcrypt
+
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+def hash_cost(hashed: str) -> Optional[int]:
+    """Return the work factor stored in a bcrypt hash ($2b$<cost>$...)"""
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+def needs_rehash(hashed: str) -> bool:
+    """Return True when a stored hash was made with a different work factor"""
+    return hash_cost(hashed) != settings.BCRYPT_ROUNDS
+
+def init_password_pool() -> ProcessPoolExecutor:
+    """Create the worker processes used for bcrypt"""
+    global _pool, _slots
+    if _pool is None:
+        logger.info(
+            "Creating password hashing pool with %s workers (bcrypt cost %s)",
+            settings.PASSWORD_HASH_WORKERS, settings.BCRYPT_ROUNDS
+        )
+        # spawn: forking a process that already runs logging and executor threads is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        _slots = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_PENDING)
+    return _pool
+
+def shutdown_password_pool() -> None:
+    """Stop the bcrypt worker processes"""
+    global _pool, _slots
+    if _pool is not None:
+        logger.info("Shutting down password hashing pool...")
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+        _slots = None
+
+async def _run(operation: str, func: Callable[..., T], *args) -> T:
+    pool = _pool or init_password_pool()
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(_slots.acquire(), settings.PASSWORD_HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        password_hash_rejections_total.inc()
+        logger.warning("Password hashing pool saturated, rejecting %s", operation)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"}
+        )
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+    finally:
+        _slots.release()
+        password_hash_seconds.observe(time.perf_counter() - started, operation)
+
+def hash_passwords(passwords: List[str]) -> List[Union[str, Exception]]:
+    """Hash a batch of passwords in parallel on the process pool (blocking).
+
+    Used by bulk imports from a worker thread; it does not take the
+    semaphore slots that bound interactive requests. Jobs go out one round
+    of PASSWORD_HASH_WORKERS at a time, so a signin submitted meanwhile
+    waits for at most one round instead of the whole batch. A job that
+    fails yields its exception in place of the hash, so one bad password
+    does not lose the rest of the batch.
+    """
+    pool = _pool or init_password_pool()
+    hashes = []
+    for start in range(0, len(passwords), settings.PASSWORD_HASH_WORKERS):
+        futures = [
+            pool.submit(hash_password, password, settings.BCRYPT_ROUNDS)
+            for password in passwords[start:start + settings.PASSWORD_HASH_WORKERS]
+        ]
+        for future in futures:
+            try:
+                hashes.append(future.result())
+            except Exception as e:
+                hashes.append(e)
+    return hashes
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the process pool"""
+    return await _run("hash", hash_password, password, settings.BCRYPT_ROUNDS)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """Verify a password on the process pool"""
+    return await _run("verify", verify_password, password, hashed)
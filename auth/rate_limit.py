@@ -0,0 +1,122 @@
+"""Token-bucket rate limiting for the expensive auth endpoints.
+
+Each limiter keeps one bucket per key (client IP or email) in a dict, so a
+check is O(1): refill by elapsed time, then take a token. Buckets that have
+refilled completely carry no information and are dropped by a periodic
+compaction, or immediately when a limiter reaches RATE_LIMIT_MAX_KEYS; if
+that is not enough, the least recently used buckets are evicted.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+from fastapi import HTTPException, Request, status
+from core.background import register_periodic
+from core.config import settings
+from core.logging import get_logger
+from core.metrics import registry
+
+logger = get_logger(__name__)
+
+rate_limited_total = registry.counter(
+    "rate_limited_total", "Requests rejected by a rate limiter", ("limiter",)
+)
+
+class TokenBucketLimiter:
+    """Per-key token buckets holding up to ``burst`` tokens, refilled at ``per_minute``"""
+
+    def __init__(self, name: str, burst: int, per_minute: float, max_keys: int):
+        self.name = name
+        self.burst = float(burst)
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> float:
+        """Take a token for ``key``; return 0 if allowed, else seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._make_room(now)
+                bucket = self._buckets[key] = [self.burst, now]
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return 0.0
+            return (1.0 - bucket[0]) / self.rate if self.rate > 0 else 3600.0
+
+    def _compact(self, now: float) -> int:
+        full = [
+            key for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * self.rate >= self.burst
+        ]
+        for key in full:
+            del self._buckets[key]
+        return len(full)
+
+    def _make_room(self, now: float) -> None:
+        # Free at least a tenth of the table so the O(n) pass stays amortized;
+        # if too few buckets are idle, drop the least recently used ones (every hit
+        # moves its bucket to the end)
+        self._compact(now)
+        target = int(self.max_keys * 0.9)
+        while len(self._buckets) > target:
+            self._buckets.popitem(last=False)
+
+    def compact(self) -> int:
+        """Drop buckets that have refilled completely"""
+        with self._lock:
+            return self._compact(time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+def _limiter(name: str, burst: int, per_minute: float) -> TokenBucketLimiter:
+    return TokenBucketLimiter(name, burst, per_minute, settings.RATE_LIMIT_MAX_KEYS)
+
+signin_ip_limiter = _limiter("signin_ip", settings.RATE_LIMIT_SIGNIN_IP_BURST, settings.RATE_LIMIT_SIGNIN_IP_PER_MINUTE)
+signin_email_limiter = _limiter(
+    "signin_email", settings.RATE_LIMIT_SIGNIN_EMAIL_BURST, settings.RATE_LIMIT_SIGNIN_EMAIL_PER_MINUTE
+)
+forgot_ip_limiter = _limiter("forgot_ip", settings.RATE_LIMIT_FORGOT_IP_BURST, settings.RATE_LIMIT_FORGOT_IP_PER_MINUTE)
+forgot_email_limiter = _limiter(
+    "forgot_email", settings.RATE_LIMIT_FORGOT_EMAIL_BURST, settings.RATE_LIMIT_FORGOT_EMAIL_PER_MINUTE
+)
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+def enforce_rate_limit(request: Request, email: Optional[str], ip_limiter: TokenBucketLimiter,
+                       email_limiter: TokenBucketLimiter) -> None:
+    """Raise 429 with Retry-After when the client IP or the email is over its limit"""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    checks = [(ip_limiter, client_ip(request))]
+    if email:
+        checks.append((email_limiter, email.lower()))
+    for limiter, key in checks:
+        retry_after = limiter.acquire(key)
+        if retry_after:
+            rate_limited_total.inc(limiter.name)
+            logger.warning("Rate limit %s exceeded for %s", limiter.name, key)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please retry later",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+
+def compact_rate_limiters() -> None:
+    """Drop idle buckets from every limiter"""
+    for limiter in (signin_ip_limiter, signin_email_limiter, forgot_ip_limiter, forgot_email_limiter):
+        dropped = limiter.compact()
+        if dropped:
+            logger.debug("Compacted %s idle buckets from %s", dropped, limiter.name)
+
+register_periodic("rate-limit-compaction", settings.RATE_LIMIT_COMPACT_SECONDS, compact_rate_limiters)
@@ -0,0 +1,202 @@
+"""Token revocation with an in-memory Bloom filter in front of SQLite.
+
+Every worker keeps a Bloom filter of the keys in ``revoked_tokens``: token
+``jti`` values and ``user:<email>`` markers for "revoke all sessions". A
+request whose token matches neither key in the filter is known not to be
+revoked without touching the database. Only possible matches (real
+revocations and the occasional false positive) are checked against the
+table.
+
+The filter is synced incrementally from the table by autoincrement ``id``
+every REVOCATION_SYNC_SECONDS, so revocations made by other workers apply
+within that interval. Bloom filters cannot forget keys, so expired rows are
+pruned every REVOCATION_PRUNE_SECONDS. Every worker runs the prune job but
+only one of them deletes the rows, so each worker compares the table with
+the rows its own filter has loaded and rebuilds the filter from the
+remaining rows when some are gone.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, Optional
+from core.background import register_periodic
+from core.config import settings
+from core.database import database_connection, awaitable
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+def user_key(email: str) -> str:
+    return f"user:{email}"
+
+class RevocationList:
+    """Bloom filter of revoked keys kept in sync with the revoked_tokens table"""
+
+    def __init__(self):
+        self._filter = self._new_filter()
+        self._last_id = 0
+        self._loaded = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _new_filter() -> BloomFilter:
+        return BloomFilter(settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_ERROR_RATE)
+
+    def might_be_revoked(self, payload: dict) -> bool:
+        """Return False when the token is certainly not revoked"""
+        bloom = self._filter
+        jti = payload.get("jti")
+        if jti is not None and jti in bloom:
+            return True
+        return user_key(payload.get("sub", "")) in bloom
+
+    def add(self, key: str) -> None:
+        """Add a key revoked by this worker without waiting for the next sync"""
+        self._filter.add(key)
+
+    def sync(self) -> int:
+        """Load rows added since the last sync; return how many were added"""
+        with self._lock:
+            with database_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    'SELECT id, key FROM revoked_tokens WHERE id > ? ORDER BY id',
+                    (self._last_id,)
+                )
+                rows = cursor.fetchall()
+            for row_id, key in rows:
+                self._filter.add(key)
+                self._last_id = row_id
+            self._loaded += len(rows)
+        if rows:
+            logger.debug("Loaded %s new revocations", len(rows))
+        return len(rows)
+
+    def rebuild(self) -> None:
+        """Rebuild the filter from the table, dropping keys of pruned rows"""
+        with self._lock:
+            bloom = self._new_filter()
+            with database_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT id, key FROM revoked_tokens ORDER BY id')
+                rows = cursor.fetchall()
+            for _, key in rows:
+                bloom.add(key)
+            self._filter = bloom
+            self._last_id = rows[-1][0] if rows else 0
+            self._loaded = len(rows)
+        logger.info("Revocation filter rebuilt with %s keys", len(rows))
+        # Pick up anything committed while the snapshot was being read
+        self.sync()
+
+    def rebuild_if_pruned(self) -> bool:
+        """Rebuild the filter if rows it has loaded were deleted, by any worker"""
+        self.sync()
+        with self._lock:
+            last_id, loaded = self._last_id, self._loaded
+        with database_connection() as conn:
+            cursor = conn.cursor()
+            # Rows added after the last sync must not hide deleted ones
+            cursor.execute('SELECT COUNT(*) FROM revoked_tokens WHERE id <= ?', (last_id,))
+            remaining = cursor.fetchone()[0]
+        if remaining >= loaded:
+            return False
+        self.rebuild()
+        return True
+
+revocations = RevocationList()
+
+def is_token_revoked(payload: dict) -> bool:
+    """Check the table for a token that matched the Bloom filter"""
+    jti = payload.get("jti")
+    keys = (jti, user_key(payload.get("sub", ""))) if jti else (user_key(payload.get("sub", "")),)
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f'SELECT key, revoked_at FROM revoked_tokens WHERE key IN ({", ".join("?" * len(keys))})',
+            keys
+        )
+        rows = cursor.fetchall()
+    issued_at = payload.get("iat", 0)
+    for key, revoked_at in rows:
+        if key == jti or issued_at <= revoked_at:
+            return True
+    return False
+
+def _record(cursor, key: str, expires_at: float) -> None:
+    cursor.execute(
+        '''INSERT INTO revoked_tokens (key, revoked_at, expires_at) VALUES (?, ?, ?)
+           ON CONFLICT(key) DO UPDATE SET
+               revoked_at = excluded.revoked_at,
+               expires_at = MAX(expires_at, excluded.expires_at)''',
+        (key, time.time(), expires_at)
+    )
+
+def revoke_token(payload: dict, refresh_family: Optional[str] = None) -> None:
+    """Revoke a single access token and optionally its refresh token family"""
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        _record(cursor, payload["jti"], payload["exp"])
+        if refresh_family:
+            cursor.execute('UPDATE refresh_tokens SET revoked = TRUE WHERE family_id = ?', (refresh_family,))
+        conn.commit()
+    revocations.add(payload["jti"])
+    logger.info("Token revoked for user: %s", payload.get("sub"))
+
+def revoke_user_sessions(user_id: int, email: str) -> None:
+    """Revoke every access and refresh token issued to a user so far"""
+    # Access tokens issued before now expire within their lifetime, so the
+    # marker only needs to outlive the longest-lived one
+    expires_at = time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        _record(cursor, user_key(email), expires_at)
+        cursor.execute('UPDATE refresh_tokens SET revoked = TRUE WHERE user_id = ?', (user_id,))
+        conn.commit()
+    revocations.add(user_key(email))
+    logger.info("All sessions revoked for user: %s", email)
+
+def prune_expired_tokens() -> None:
+    """Delete expired revocations and refresh tokens, then drop pruned keys from the filter"""
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM revoked_tokens WHERE expires_at < ?', (time.time(),))
+        pruned = cursor.rowcount
+        cursor.execute('DELETE FROM refresh_tokens WHERE expires_at < ?', (datetime.utcnow(),))
+        conn.commit()
+    if pruned:
+        logger.info("Pruned %s expired revocations", pruned)
+    # Another worker may have pruned the rows this worker's filter still holds
+    revocations.rebuild_if_pruned()
+
+register_periodic("revocation-sync", settings.REVOCATION_SYNC_SECONDS, revocations.sync)
+register_periodic("revocation-prune", settings.REVOCATION_PRUNE_SECONDS, prune_expired_tokens)
+
+# Awaitable variants for the async route handlers
+is_token_revoked_async = awaitable(is_token_revoked)
+revoke_token_async = awaitable(revoke_token)
+revoke_user_sessions_async = awaitable(revoke_user_sessions)
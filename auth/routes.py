@@ -1,25 +1,32 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from fastapi.security import HTTPBearer
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query, Request, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
 from typing import Optional
-import sqlite3
-import hashlib
 import secrets
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from core.bulk_io import detect_format, spool_request_body
+from .bulk_import import import_users_from_file_async
+from .passwords import hash_password_async, verify_password_async, needs_rehash
+from .rate_limit import (
+    enforce_rate_limit,
+    signin_ip_limiter,
+    signin_email_limiter,
+    forgot_ip_limiter,
+    forgot_email_limiter
+)
+from .revocation import revoke_token_async, revoke_user_sessions_async
 from .utils import (
-    hash_password, 
-    verify_password, 
+    access_token_claims,
     create_access_token, 
-    create_refresh_token,
     verify_token,
-    get_user_by_email,
-    create_user,
-    update_user_password,
-    store_reset_token,
-    validate_reset_token,
-    send_reset_email
+    issue_refresh_token_async,
+    rotate_refresh_token_async,
+    get_user_by_email_async,
+    get_user_by_id_async,
+    verify_admin,
+    create_user_async,
+    update_user_password_async,
+    store_reset_token_async,
+    validate_reset_token_async
 )
 
 router = APIRouter()
@@ -43,6 +50,12 @@ class ResetPassword(BaseModel):
     token: str
     new_password: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
 class TokenResponse(BaseModel):
     access_token: str
     refresh_token: str
@@ -51,7 +64,7 @@ class TokenResponse(BaseModel):
 @router.post("/signup", status_code=status.HTTP_201_CREATED)
 async def signup(user: UserSignup):
     # Check if user already exists
-    existing_user = get_user_by_email(user.email)
+    existing_user = await get_user_by_email_async(user.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -66,15 +79,23 @@ async def signup(user: UserSignup):
         )
 
     # Create user
-    hashed_password = hash_password(user.password)
-    user_id = create_user(user.name, user.email, hashed_password, user.role)
+    hashed_password = await hash_password_async(user.password)
+    user_id = await create_user_async(user.name, user.email, hashed_password, user.role)
 
     return {"message": "User created successfully", "user_id": user_id}
 
+async def rehash_password(email: str, password: str):
+    """Upgrade a stored hash to the configured bcrypt cost"""
+    hashed_password = await hash_password_async(password)
+    await update_user_password_async(email, hashed_password)
+
 @router.post("/signin", response_model=TokenResponse)
-async def signin(user: UserSignin):
+async def signin(user: UserSignin, http_request: Request, background_tasks: BackgroundTasks):
+    # Reject bursts before any database or bcrypt work
+    enforce_rate_limit(http_request, user.email, signin_ip_limiter, signin_email_limiter)
+
     # Get user from database
-    db_user = get_user_by_email(user.email)
+    db_user = await get_user_by_email_async(user.email)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -82,25 +103,109 @@ async def signin(user: UserSignin):
         )
     
     # Verify password
-    if not verify_password(user.password, db_user[3]):  # password is at index 3
+    if not await verify_password_async(user.password, db_user[3]):  # password is at index 3
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
 
+    # Hashes made with an outdated work factor are upgraded after the response
+    if needs_rehash(db_user[3]):
+        background_tasks.add_task(rehash_password, user.email, user.password)
+
     # Create tokens
-    access_token = create_access_token({"sub": user.email, "role": db_user[4]})
-    refresh_token = create_refresh_token({"sub": user.email})
+    access_token = create_access_token(access_token_claims(db_user))
+    refresh_token = await issue_refresh_token_async(db_user)
 
     return TokenResponse(
         access_token=access_token,
         refresh_token=refresh_token
     )
 
+@router.post("/refresh", response_model=TokenResponse)
+async def refresh(request: RefreshRequest):
+    # Exchange a refresh token for a new pair without a bcrypt verification
+    payload = verify_token(request.refresh_token)
+    if payload is None or payload.get("type") != "refresh" or "jti" not in payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+
+    rotated = await rotate_refresh_token_async(payload["jti"])
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+
+    db_user, refresh_token = rotated
+    return TokenResponse(
+        access_token=create_access_token(access_token_claims(db_user)),
+        refresh_token=refresh_token
+    )
+
+@router.post("/logout")
+async def logout(
+    request: Optional[LogoutRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    # Revoke the presented access token and, if given, its refresh token family
+    payload = verify_token(credentials.credentials)
+    if payload is None or payload.get("type") != "access" or "jti" not in payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    refresh_family = None
+    if request is not None and request.refresh_token:
+        refresh_payload = verify_token(request.refresh_token)
+        if refresh_payload and refresh_payload.get("type") == "refresh" \
+                and refresh_payload.get("sub") == payload.get("sub"):
+            refresh_family = refresh_payload.get("fam")
+
+    await revoke_token_async(payload, refresh_family)
+    return {"message": "Logged out successfully"}
+
+@router.post("/users/{user_id}/revoke-sessions")
+async def revoke_sessions(user_id: int, admin_user: dict = Depends(verify_admin)):
+    # Invalidate every access and refresh token the user holds (Admin only)
+    user = await get_user_by_id_async(user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    await revoke_user_sessions_async(user[0], user[2])
+    return {"message": "All sessions revoked", "user_id": user_id}
+
+@router.post("/users/import")
+async def import_users(
+    http_request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson (default: from Content-Type)"),
+    admin_user: dict = Depends(verify_admin)
+):
+    # Bulk create users from a CSV or NDJSON request body (Admin only)
+    try:
+        fmt = detect_format(format, http_request.headers.get("content-type"))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    upload = await spool_request_body(http_request)
+    try:
+        return await import_users_from_file_async(upload, fmt)
+    finally:
+        upload.close()
+
 @router.post("/forgot-password")
-async def forgot_password(request: ForgotPassword):
+async def forgot_password(request: ForgotPassword, http_request: Request):
+    enforce_rate_limit(http_request, request.email, forgot_ip_limiter, forgot_email_limiter)
+
     # Check if user exists
-    user = get_user_by_email(request.email)
+    user = await get_user_by_email_async(request.email)
     if not user:
         # Don't reveal if email exists or not for security
         return {"message": "Reset link has been sent"}
@@ -108,23 +213,15 @@ async def forgot_password(request: ForgotPassword):
     # Generate reset token
     reset_token = secrets.token_urlsafe(32)
     
-    # Store reset token in database
-    store_reset_token(request.email, reset_token)
-    
-    # Send email
-    try:
-        send_reset_email(request.email, reset_token)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to send reset email"
-        )
+    # Store reset token; the email is queued in the same transaction and
+    # delivered by the outbox worker
+    await store_reset_token_async(request.email, reset_token)
     return {"message": "Reset link has been sent"}
 
 @router.post("/reset-password")
 async def reset_password(request: ResetPassword):
     # Validate reset token
-    email = validate_reset_token(request.token)
+    email = await validate_reset_token_async(request.token)
     if not email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -132,9 +229,9 @@ async def reset_password(request: ResetPassword):
         )
     
     # Hash new password
-    hashed_password = hash_password(request.new_password)
+    hashed_password = await hash_password_async(request.new_password)
     
     # Update user password
-    update_user_password(email, hashed_password)
+    await update_user_password_async(email, hashed_password)
     
     return {"message": "Password reset successfully"}
\ No newline at end of file
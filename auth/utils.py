@@ -1,17 +1,22 @@
-import bcrypt
+import hashlib
 import jwt
+import secrets
 import sqlite3
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import time
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 import os
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer
+from core.background import register_periodic
+from core.cache import TTLCache
 from core.config import settings
-from core.database import get_database_connection
+from core.database import database_connection, awaitable
 from core.logging import get_logger
+from core.outbox import enqueue_email
+from .passwords import hash_password, verify_password
+from .revocation import revocations, is_token_revoked_async
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -31,160 +36,248 @@ SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
 
 security = HTTPBearer()
 
+# Authenticated users by email, so get_current_user skips the users table
+_user_cache = TTLCache("users", settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+# Decoded token payloads by SHA-256 digest; each entry expires with its token
+_token_cache = TTLCache("tokens", settings.TOKEN_CACHE_SIZE, ttl=0)
+
+def invalidate_cached_user(email: str):
+    """Drop a user from the authentication cache after their record changes"""
+    _user_cache.delete(email)
+
 def init_db():
     """Initialize the database with required tables"""
     # This function is now handled by core.database.init_database()
     pass
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
-    logger.debug("Hashing password")
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
-
-def verify_password(password: str, hashed: str) -> bool:
-    """Verify a password against its hash"""
-    logger.debug("Verifying password")
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+def access_token_claims(user) -> dict:
+    """Build the access token claims for a users row"""
+    claims = {"sub": user[2], "role": user[4]}
+    if settings.AUTH_TRUSTED_CLAIMS:
+        claims.update({"id": user[0], "name": user[1]})
+    return claims
 
 def create_access_token(data: dict) -> str:
     """Create JWT access token"""
-    logger.debug(f"Creating access token for user: {data.get('sub')}")
+    logger.debug("Creating access token for user: %s", data.get('sub'))
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire, "type": "access"})
+    # jti identifies the token for logout; iat (sub-second) orders it against session revocations
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": secrets.token_urlsafe(12), "type": "access"})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 def create_refresh_token(data: dict) -> str:
     """Create JWT refresh token"""
-    logger.debug(f"Creating refresh token for user: {data.get('sub')}")
+    logger.debug("Creating refresh token for user: %s", data.get('sub'))
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire, "type": "refresh"})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
+def _insert_refresh_token(cursor: sqlite3.Cursor, user_id: int, family_id: str) -> str:
+    jti = secrets.token_urlsafe(16)
+    expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    cursor.execute(
+        'INSERT INTO refresh_tokens (jti, family_id, user_id, expires_at) VALUES (?, ?, ?, ?)',
+        (jti, family_id, user_id, expires_at)
+    )
+    return jti
+
+def issue_refresh_token(user) -> str:
+    """Start a new refresh token family for a users row and return its first token"""
+    family_id = uuid.uuid4().hex
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        jti = _insert_refresh_token(cursor, user[0], family_id)
+        conn.commit()
+    logger.debug("Started refresh token family %s for user: %s", family_id, user[2])
+    return create_refresh_token({"sub": user[2], "jti": jti, "fam": family_id})
+
+def rotate_refresh_token(jti: str):
+    """Consume a refresh token and issue its successor in the same family.
+
+    Returns ``(user, refresh_token)``, or None when the token is unknown,
+    already used or revoked. Presenting a consumed token again revokes the
+    whole family, so a stolen token stops working for the thief and the owner.
+    """
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(
+            '''UPDATE refresh_tokens SET used_at = CURRENT_TIMESTAMP
+               WHERE jti = ? AND used_at IS NULL AND NOT revoked
+               RETURNING family_id, user_id''',
+            (jti,)
+        )
+        consumed = cursor.fetchone()
+        if consumed is None:
+            cursor.execute('SELECT family_id FROM refresh_tokens WHERE jti = ?', (jti,))
+            known = cursor.fetchone()
+            if known:
+                logger.warning("Refresh token reuse detected, revoking family: %s", known[0])
+                cursor.execute('UPDATE refresh_tokens SET revoked = TRUE WHERE family_id = ?', (known[0],))
+            conn.commit()
+            return None
+
+        family_id, user_id = consumed
+        cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
+        user = cursor.fetchone()
+        if user is None:
+            conn.commit()
+            return None
+        new_jti = _insert_refresh_token(cursor, user_id, family_id)
+        conn.commit()
+
+    logger.debug("Rotated refresh token in family %s for user: %s", family_id, user[2])
+    return user, create_refresh_token({"sub": user[2], "jti": new_jti, "fam": family_id})
+
 def verify_token(token: str) -> Optional[dict]:
-    """Verify and decode JWT token"""
+    """Verify and decode JWT token.
+
+    Successfully decoded payloads are cached by token digest until the
+    token's ``exp``, so a client reusing its token skips the HMAC check.
+    Callers must treat the returned payload as read-only.
+    """
+    use_cache = _token_cache.maxsize > 0
+    if use_cache:
+        digest = hashlib.sha256(token.encode()).digest()
+        payload = _token_cache.get(digest)
+        if payload is not None:
+            return payload
     try:
         logger.debug("Verifying JWT token")
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        logger.debug(f"Token verified for user: {payload.get('sub')}")
-        return payload
+        logger.debug("Token verified for user: %s", payload.get('sub'))
     except jwt.PyJWTError as e:
-        logger.warning(f"Token verification failed: {e}")
+        logger.warning("Token verification failed: %s", e)
         return None
+    if use_cache and "exp" in payload:
+        _token_cache.set(digest, payload, ttl=payload["exp"] - time.time())
+    return payload
 
 def get_user_by_email(email: str):
     """Get user from database by email"""
-    logger.debug(f"Fetching user by email: {email}")
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
-    user = cursor.fetchone()
-    conn.close()
+    logger.debug("Fetching user by email: %s", email)
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
+        user = cursor.fetchone()
     
     if user:
-        logger.debug(f"User found: {email}")
+        logger.debug("User found: %s", email)
     else:
-        logger.debug(f"User not found: {email}")
+        logger.debug("User not found: %s", email)
     
     return user
 
 def create_user(name: str, email: str, password: str, role: str) -> int:
     """Create a new user in the database"""
-    logger.info(f"Creating new user: {email} with role: {role}")
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        'INSERT INTO users (name, email, password, role) VALUES (?, ?, ?, ?)',
-        (name, email, password, role)
-    )
-    user_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    logger.info(f"User created successfully with ID: {user_id}")
+    logger.info("Creating new user: %s with role: %s", email, role)
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT INTO users (name, email, password, role) VALUES (?, ?, ?, ?)',
+            (name, email, password, role)
+        )
+        user_id = cursor.lastrowid
+        conn.commit()
+    logger.info("User created successfully with ID: %s", user_id)
     return user_id
 
 def update_user_password(email: str, new_password: str):
     """Update user password in the database"""
-    logger.info(f"Updating password for user: {email}")
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        'UPDATE users SET password = ? WHERE email = ?',
-        (new_password, email)
-    )
-    conn.commit()
-    conn.close()
-    logger.info(f"Password updated successfully for user: {email}")
+    logger.info("Updating password for user: %s", email)
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'UPDATE users SET password = ? WHERE email = ?',
+            (new_password, email)
+        )
+        conn.commit()
+    invalidate_cached_user(email)
+    logger.info("Password updated successfully for user: %s", email)
 
 def store_reset_token(email: str, token: str):
-    """Store password reset token in database"""
-    logger.info(f"Storing reset token for user: {email}")
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    expires_at = datetime.utcnow() + timedelta(minutes=settings.RESET_TOKEN_EXPIRE_MINUTES)
-    cursor.execute(
-        'INSERT INTO reset_tokens (email, token, expires_at) VALUES (?, ?, ?)',
-        (email, token, expires_at)
-    )
-    conn.commit()
-    conn.close()
-    logger.debug(f"Reset token stored for user: {email}")
+    """Store password reset token and queue the reset email in one transaction"""
+    logger.info("Storing reset token for user: %s", email)
+    subject, body = build_reset_email(token)
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        expires_at = datetime.utcnow() + timedelta(minutes=settings.RESET_TOKEN_EXPIRE_MINUTES)
+        cursor.execute(
+            'INSERT INTO reset_tokens (email, token_hash, expires_at) VALUES (?, ?, ?)',
+            (email, hash_reset_token(token), expires_at)
+        )
+        enqueue_email(cursor, email, subject, body)
+        conn.commit()
+    logger.debug("Reset token stored and email queued for user: %s", email)
+
+def hash_reset_token(token: str) -> str:
+    """Digest stored in place of the reset token itself"""
+    return hashlib.sha256(token.encode()).hexdigest()
 
 def validate_reset_token(token: str) -> Optional[str]:
-    """Validate reset token and return email if valid"""
-    logger.debug(f"Validating reset token: {token[:10]}...")
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        'SELECT email, expires_at, used FROM reset_tokens WHERE token = ?',
-        (token,)
-    )
-    result = cursor.fetchone()
-    
+    """Consume a reset token and return its email if it is valid.
+
+    Matching, the expiry check and marking the token used happen in one
+    statement, so a token can never be redeemed twice.
+    """
+    logger.debug("Validating reset token")
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            '''UPDATE reset_tokens SET used = TRUE
+               WHERE token_hash = ? AND NOT used AND expires_at > ?
+               RETURNING email''',
+            (hash_reset_token(token), datetime.utcnow())
+        )
+        result = cursor.fetchone()
+        conn.commit()
+
     if not result:
-        logger.warning("Reset token not found")
-        conn.close()
+        logger.warning("Reset token not found, already used or expired")
         return None
-    
-    email, expires_at, used = result
-    
-    # Check if token is already used
-    if used:
-        logger.warning(f"Reset token already used for user: {email}")
-        conn.close()
-        return None
-    
-    # Check if token is expired
-    expires_at = datetime.fromisoformat(expires_at)
-    if datetime.utcnow() > expires_at:
-        logger.warning(f"Reset token expired for user: {email}")
-        conn.close()
-        return None
-    
-    # Mark token as used
-    cursor.execute(
-        'UPDATE reset_tokens SET used = TRUE WHERE token = ?',
-        (token,)
-    )
-    conn.commit()
-    conn.close()
-    
-    logger.info(f"Reset token validated successfully for user: {email}")
+
+    email = result[0]
+    logger.info("Reset token validated successfully for user: %s", email)
     return email
 
-def send_reset_email(email: str, token: str):
-    """Send password reset email"""
-    logger.info(f"Sending reset email to: {email}")
-    # Create message
-    msg = MIMEMultipart()
-    msg['From'] = settings.SMTP_USERNAME
-    msg['To'] = email
-    msg['Subject'] = "Password Reset Request"
-    
-    # Email body
+def sweep_reset_tokens() -> int:
+    """Delete used and expired reset tokens in small batches.
+
+    Each batch is its own short transaction so request handlers waiting
+    for the write lock get in between batches. Used and expired tokens are
+    swept separately: an ``OR`` of the two conditions cannot use an index
+    and scanned the whole table for every batch.
+    """
+    deleted = 0
+    for condition, parameters in (
+        ("used = 1", ()),  # idx_reset_tokens_used
+        ("expires_at < ?", (datetime.utcnow(),))  # idx_reset_tokens_expires
+    ):
+        while True:
+            with database_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f'''DELETE FROM reset_tokens WHERE id IN (
+                           SELECT id FROM reset_tokens WHERE {condition} LIMIT ?
+                       )''',
+                    (*parameters, settings.RESET_TOKEN_SWEEP_BATCH)
+                )
+                batch = cursor.rowcount
+                conn.commit()
+            deleted += batch
+            if batch < settings.RESET_TOKEN_SWEEP_BATCH:
+                break
+            time.sleep(settings.RESET_TOKEN_SWEEP_PAUSE)
+    if deleted:
+        logger.info("Swept %s expired or used reset tokens", deleted)
+    return deleted
+
+def build_reset_email(token: str):
+    """Return the subject and body of the password reset email"""
+    subject = "Password Reset Request"
     body = f"""
     Hello,
     
@@ -200,39 +293,24 @@ def send_reset_email(email: str, token: str):
     Arunim Malviya
     E-Commerce Backend Developer
     """
-    
-    msg.attach(MIMEText(body, 'plain'))
-    
-    # Send email
-    try:
-        server = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT)
-        server.starttls()
-        server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-        text = msg.as_string()
-        server.sendmail(settings.SMTP_USERNAME, email, text)
-        server.quit()
-        logger.info(f"Reset email sent successfully to: {email}")
-    except Exception as e:
-        logger.error(f"Failed to send reset email to {email}: {e}")
-        raise e
+    return subject, body
 
 def get_user_by_id(user_id: int):
     """Get user from database by ID"""
-    logger.debug(f"Fetching user by ID: {user_id}")
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-    user = cursor.fetchone()
-    conn.close()
+    logger.debug("Fetching user by ID: %s", user_id)
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
+        user = cursor.fetchone()
     
     if user:
-        logger.debug(f"User found with ID: {user_id}")
+        logger.debug("User found with ID: %s", user_id)
     else:
-        logger.debug(f"User not found with ID: {user_id}")
+        logger.debug("User not found with ID: %s", user_id)
     
     return user
 
-def get_current_user(token: str = Depends(security)) -> dict:
+async def get_current_user(token: str = Depends(security)) -> dict:
     """Get current user from JWT token"""
     try:
         logger.debug("Authenticating current user")
@@ -245,6 +323,14 @@ def get_current_user(token: str = Depends(security)) -> dict:
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        if payload.get("type") != "access":
+            logger.warning("Non-access token presented for authentication")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
         email: str = payload.get("sub")
         if email is None:
             logger.warning("Token missing subject (email)")
@@ -253,31 +339,79 @@ def get_current_user(token: str = Depends(security)) -> dict:
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+
+        # The Bloom filter rules out almost every token without a query
+        if revocations.might_be_revoked(payload) and await is_token_revoked_async(payload):
+            logger.warning("Revoked token presented for user: %s", email)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        
+        # Trusted claims mode: the token already carries everything we need
+        if settings.AUTH_TRUSTED_CLAIMS and "id" in payload and "role" in payload:
+            logger.debug("User authenticated from token claims: %s", email)
+            return {
+                "id": payload["id"],
+                "name": payload.get("name"),
+                "email": email,
+                "role": payload["role"]
+            }
+        
+        current_user = _user_cache.get(email)
+        if current_user is not None:
+            logger.debug("User authenticated from cache: %s", email)
+            return dict(current_user)
         
         # Get user from database
-        user = get_user_by_email(email)
+        user = await get_user_by_email_async(email)
         if user is None:
-            logger.warning(f"User not found in database: {email}")
+            logger.warning("User not found in database: %s", email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        logger.debug(f"User authenticated successfully: {email}")
-        return {
+        logger.debug("User authenticated successfully: %s", email)
+        current_user = {
             "id": user[0],
             "name": user[1],
             "email": user[2],
             "role": user[4]
         }
+        _user_cache.set(email, current_user)
+        return dict(current_user)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Authentication error: {e}")
+        logger.error("Authentication error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+# Dependency to verify admin role
+async def verify_admin(current_user: dict = Depends(get_current_user)):
+    if current_user.get("role") != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    return current_user
+
+register_periodic("reset-token-sweep", settings.RESET_TOKEN_SWEEP_SECONDS, sweep_reset_tokens)
+
+# Awaitable variants for the async route handlers
+get_user_by_email_async = awaitable(get_user_by_email)
+get_user_by_id_async = awaitable(get_user_by_id)
+create_user_async = awaitable(create_user)
+update_user_password_async = awaitable(update_user_password)
+store_reset_token_async = awaitable(store_reset_token)
+validate_reset_token_async = awaitable(validate_reset_token)
+issue_refresh_token_async = awaitable(issue_refresh_token)
+rotate_refresh_token_async = awaitable(rotate_refresh_token)
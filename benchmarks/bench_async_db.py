@@ -0,0 +1,76 @@
+"""Concurrency benchmark for the async data access layer.
+
+Fires many slow queries at once, first by calling the blocking helper
+straight from coroutines (how the routes used to work) and then through
+the bounded database executor. For each mode it reports the wall time and
+the worst stall seen by a heartbeat task standing in for other requests.
+
+Usage: python -m benchmarks.bench_async_db [--requests 64] [--rows 200000]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+SLOW_QUERY = '''
+    WITH RECURSIVE counter(x) AS (
+        SELECT 1 UNION ALL SELECT x + 1 FROM counter WHERE x < ?
+    )
+    SELECT COUNT(*) FROM counter
+'''
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=64, help="Concurrent slow queries")
+    parser.add_argument("--rows", type=int, default=200000, help="Rows generated per query")
+    return parser.parse_args()
+
+async def heartbeat(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Return the worst delay between scheduled and actual wake-ups"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+async def run_mode(request, count: int):
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(heartbeat(stop))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await asyncio.gather(*(request() for _ in range(count)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    return elapsed, await monitor
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    from core.config import settings
+    from core.database import database_connection, run_in_db_executor, shutdown_executor, close_pool
+
+    def slow_query():
+        with database_connection() as conn:
+            return conn.execute(SLOW_QUERY, (args.rows,)).fetchone()[0]
+
+    async def blocking_request():
+        return slow_query()
+
+    async def executor_request():
+        return await run_in_db_executor(slow_query)
+
+    print(f"{args.requests} concurrent queries, {args.rows} rows each, "
+          f"{settings.DB_EXECUTOR_WORKERS} executor workers")
+    print(f"{'mode':<10} {'wall (s)':>10} {'req/s':>10} {'max loop stall (ms)':>22}")
+    for name, request in (("blocking", blocking_request), ("executor", executor_request)):
+        elapsed, stall = asyncio.run(run_mode(request, args.requests))
+        print(f"{name:<10} {elapsed:>10.3f} {args.requests / elapsed:>10.1f} {stall * 1000:>22.1f}")
+
+    shutdown_executor()
+    close_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Per-request authentication overhead with the decoded-token cache on and off.
+
+Runs ``get_current_user`` the way an authenticated endpoint does, with one
+access token presented over and over like a mobile client within a
+session. The user cache is pre-warmed so the numbers show JWT handling
+only, not database time. Logging is set to INFO, as in production.
+
+Usage: python -m benchmarks.bench_auth [--requests 50000]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from fastapi.security import HTTPAuthorizationCredentials
+
+from auth import utils
+from core.cache import TTLCache
+from core.config import settings
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50000, help="Authenticated requests per scenario")
+    return parser.parse_args()
+
+async def measure(credentials: HTTPAuthorizationCredentials, count: int) -> float:
+    started = time.perf_counter()
+    for _ in range(count):
+        await utils.get_current_user(credentials)
+    return (time.perf_counter() - started) / count
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO)
+    email = "bench@example.com"
+    token = utils.create_access_token({"sub": email, "role": "user"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    utils._user_cache.set(email, {"id": 1, "name": "bench", "email": email, "role": "user"}, ttl=3600)
+
+    print(f"{'token cache':<12} {'us/request':>12}")
+    for label, size in (("off", 0), ("on", settings.TOKEN_CACHE_SIZE)):
+        utils._token_cache = TTLCache("tokens", size, ttl=0)
+        per_request = asyncio.run(measure(credentials, args.requests))
+        print(f"{label:<12} {per_request * 1e6:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Inventory sync: per-SKU PUT path vs the batched inventory update.
+
+``per-sku`` is what ``PUT /admin/products/{id}`` costs in the database layer
+for each SKU: ``get_product_by_id``, ``update_product`` (own connection and
+commit) and ``get_product_by_id`` again. ``batch`` applies the same number of
+updates, a mix of absolute stock levels, stock deltas and price changes,
+with one ``apply_inventory_updates`` call. ``batch (no-op)`` sends the batch
+again, so every entry is unchanged and nothing is written.
+
+Usage: python -m benchmarks.bench_inventory_update [--products 200000] [--updates 10000] [--per-sku 2000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=200000, help="Catalog size")
+    parser.add_argument("--updates", type=int, default=10000, help="SKUs per batch")
+    parser.add_argument("--per-sku", type=int, default=2000, help="SKUs updated one by one (extrapolated)")
+    return parser.parse_args()
+
+def populate(conn, count: int, rng: random.Random) -> None:
+    conn.executemany(
+        "INSERT INTO products (name, description, price, stock, category) VALUES (?, ?, ?, ?, ?)",
+        (
+            (f"Product {index}", "warehouse item", round(rng.uniform(1, 500), 2), rng.randint(0, 100), "home")
+            for index in range(count)
+        )
+    )
+    conn.commit()
+
+def updates(count: int, products: int, rng: random.Random) -> list:
+    batch = []
+    for product_id in rng.sample(range(1, products + 1), count):
+        kind = rng.random()
+        if kind < 0.6:
+            batch.append({"id": product_id, "stock": rng.randint(0, 500)})
+        elif kind < 0.9:
+            batch.append({"id": product_id, "stock_delta": rng.randint(1, 20)})
+        else:
+            batch.append({"id": product_id, "stock": rng.randint(0, 500), "price": round(rng.uniform(1, 500), 2)})
+    return batch
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = os.path.join(workdir, "bench.db")
+    os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "60000")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from core.database import close_pool, database_connection, init_database
+    from products.utils import apply_inventory_updates, get_product_by_id, update_product
+
+    init_database()
+    rng = random.Random(11)
+    with database_connection() as conn:
+        populate(conn, args.products, rng)
+
+    started = time.perf_counter()
+    for update in updates(args.per_sku, args.products, rng):
+        get_product_by_id(update["id"])
+        update_product(update["id"], stock=update.get("stock", 1), price=update.get("price"))
+        get_product_by_id(update["id"])
+    per_sku_rate = args.per_sku / (time.perf_counter() - started)
+
+    print(f"{'mode':<16} {'skus':>8} {'changed':>8} {'seconds':>9} {'skus/s':>10}")
+    print(f"{'per-sku':<16} {args.per_sku:>8} {args.per_sku:>8} {args.per_sku / per_sku_rate:>9.2f} {per_sku_rate:>10.0f}")
+    print(f"{'  extrapolated':<16} {args.updates:>8} {'':>8} {args.updates / per_sku_rate:>9.2f}")
+
+    batch = updates(args.updates, args.products, rng)
+    started = time.perf_counter()
+    result = apply_inventory_updates(batch)
+    seconds = time.perf_counter() - started
+    print(f"{'batch':<16} {len(batch):>8} {len(result['changed']):>8} {seconds:>9.2f} {len(batch) / seconds:>10.0f}")
+
+    # Deltas are relative, so the repeat sends the resulting absolute values
+    settled = [{"id": change["id"], "stock": change["stock"]} for change in result["changed"]]
+    started = time.perf_counter()
+    result = apply_inventory_updates(settled)
+    seconds = time.perf_counter() - started
+    print(f"{'batch (no-op)':<16} {len(settled):>8} {len(result['changed']):>8} {seconds:>9.2f} {len(settled) / seconds:>10.0f}")
+    close_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Per-request logging overhead microbenchmark.
+
+A simulated request makes the same logging calls as an authenticated
+order lookup: six DEBUG calls (token check, user lookup, order fetch)
+and one INFO call. Each scenario reports the CPU time spent in the
+request thread itself, which is the latency a handler pays for logging.
+
+* before: synchronous StreamHandler and FileHandler, f-string messages
+* after:  QueueHandler/QueueListener pipeline, lazy %-style arguments
+
+Usage: python -m benchmarks.bench_logging [--requests 20000]
+"""
+import argparse
+import logging
+import os
+import queue
+import tempfile
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from core.logging import DebugSamplingFilter
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(funcName)s:%(lineno)d - %(message)s"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000, help="Simulated requests per scenario")
+    return parser.parse_args()
+
+def request_fstrings(logger: logging.Logger, email: str, user_id: int, orders: list):
+    logger.debug(f"Verifying JWT token")
+    logger.debug(f"Token verified for user: {email}")
+    logger.debug(f"Fetching user by email: {email}")
+    logger.debug(f"User authenticated successfully: {email}")
+    logger.debug(f"Fetching orders for user: {user_id}")
+    logger.debug(f"Found {len(orders)} orders for user {user_id}")
+    logger.info(f"Order {orders[0]} created successfully")
+
+def request_lazy(logger: logging.Logger, email: str, user_id: int, orders: list):
+    logger.debug("Verifying JWT token")
+    logger.debug("Token verified for user: %s", email)
+    logger.debug("Fetching user by email: %s", email)
+    logger.debug("User authenticated successfully: %s", email)
+    logger.debug("Fetching orders for user: %s", user_id)
+    logger.debug("Found %s orders for user %s", len(orders), user_id)
+    logger.info("Order %s created successfully", orders[0])
+
+def sync_logger(level: int, workdir: str) -> logging.Logger:
+    logger = logging.getLogger(f"bench.sync.{level}")
+    logger.propagate = False
+    logger.setLevel(level)
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in (
+        logging.StreamHandler(open(os.devnull, "w")),
+        logging.FileHandler(os.path.join(workdir, f"sync_{level}.log"), encoding="utf-8")
+    ):
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+    return logger
+
+def queued_logger(level: int, workdir: str, sample_rate: float = 1.0):
+    logger = logging.getLogger(f"bench.queued.{level}.{sample_rate}")
+    logger.propagate = False
+    logger.setLevel(level)
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [
+        logging.StreamHandler(open(os.devnull, "w")),
+        RotatingFileHandler(os.path.join(workdir, f"queued_{level}_{sample_rate}.log"), maxBytes=10 * 1024 * 1024,
+                            backupCount=2, encoding="utf-8")
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(DebugSamplingFilter(sample_rate))
+    logger.addHandler(queue_handler)
+    listener = QueueListener(log_queue, *handlers)
+    listener.start()
+    return logger, listener
+
+def measure(request, logger: logging.Logger, count: int) -> float:
+    """Return CPU seconds spent per request in the calling thread"""
+    orders = [1, 2, 3]
+    started = time.thread_time()
+    for i in range(count):
+        request(logger, "user@example.com", i, orders)
+    return (time.thread_time() - started) / count
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp()
+    scenarios = [
+        ("before, DEBUG", request_fstrings, sync_logger(logging.DEBUG, workdir), None),
+        ("before, INFO", request_fstrings, sync_logger(logging.INFO, workdir), None),
+    ]
+    for label, level, rate in (
+        ("after, DEBUG", logging.DEBUG, 1.0),
+        ("after, DEBUG sampled 5%", logging.DEBUG, 0.05),
+        ("after, INFO", logging.INFO, 1.0),
+    ):
+        logger, listener = queued_logger(level, workdir, rate)
+        scenarios.append((label, request_lazy, logger, listener))
+
+    print(f"{'scenario':<26} {'us/request':>12}")
+    for label, request, logger, listener in scenarios:
+        per_request = measure(request, logger, args.requests)
+        if listener is not None:
+            listener.stop()
+        print(f"{label:<26} {per_request * 1e6:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Full catalog feed: OFFSET paging vs the streaming export.
+
+``offset pages`` is what a partner paging through ``GET /admin/products``
+costs in the database layer: ``get_products`` page after page at
+``per_page=100``, with the response models built for each page. ``export``
+streams the same catalog through ``products.export`` as NDJSON, and
+``export gzip`` as gzip-compressed NDJSON. Peak memory is traced
+separately from the timing runs.
+
+Usage: python -m benchmarks.bench_product_export [--products 20000 200000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, nargs="+", default=[20000, 200000], help="Catalog sizes")
+    parser.add_argument("--per-page", type=int, default=100, help="Page size for OFFSET paging")
+    return parser.parse_args()
+
+def populate(conn, count: int, rng: random.Random) -> None:
+    words = ["oak", "steel", "lamp", "chair", "desk", "shelf", "brass", "linen", "wool", "table", "rug", "vase"]
+    conn.executemany(
+        "INSERT INTO products (name, description, price, stock, category) VALUES (?, ?, ?, ?, ?)",
+        (
+            (f"Product {index}", " ".join(rng.choices(words, k=20)), round(rng.uniform(1, 500), 2),
+             rng.randint(0, 100), rng.choice(["home", "office", "garden", "kitchen"]))
+            for index in range(count)
+        )
+    )
+    conn.commit()
+
+def measure(func) -> tuple:
+    started = time.perf_counter()
+    size = func()
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, seconds, peak
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = os.path.join(workdir, "bench.db")
+    os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "60000")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from core.config import settings
+    from core.database import close_pool, database_connection, init_database
+    from products.export import iter_product_export
+    from products.routes import ProductResponse
+    from products.utils import get_products
+
+    def offset_pages() -> int:
+        exported, offset = 0, 0
+        while True:
+            page = get_products(limit=args.per_page, offset=offset)
+            if not page:
+                return exported
+            models = [ProductResponse(**dict(zip(ProductResponse.model_fields, row))) for row in page]
+            exported += len(models)
+            offset += args.per_page
+
+    def export(compress: bool):
+        return lambda: sum(len(chunk) for chunk in iter_product_export("ndjson", compress))
+
+    rng = random.Random(5)
+    print(f"{'products':>9} {'mode':<14} {'output':>16} {'seconds':>9} {'rows/s':>10} {'peak KB':>9}")
+    for count in args.products:
+        close_pool()
+        settings.DATABASE_URL = os.path.join(workdir, f"products_{count}.db")
+        init_database()
+        with database_connection() as conn:
+            populate(conn, count, rng)
+
+        for label, func, unit in (
+            ("offset pages", offset_pages, "rows"),
+            ("export", export(False), "bytes"),
+            ("export gzip", export(True), "bytes"),
+        ):
+            size, seconds, peak = measure(func)
+            print(
+                f"{count:>9} {label:<14} {f'{size} {unit}':>16} {seconds:>9.2f} "
+                f"{count / seconds:>10.0f} {peak // 1024:>9}"
+            )
+    close_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Product catalog load: per-row API path vs the bulk importer.
+
+``per-row`` is what loading through ``POST /admin/products`` costs in the
+database layer: ``create_product`` (own connection and commit) followed by
+``get_product_by_id`` for every product. ``import`` streams a CSV catalog
+with explicit ids through ``products.bulk_import`` into an empty database;
+``re-import`` loads the same file again (every row unchanged) and
+``deferred index`` repeats the first load on another empty database with
+the search index rebuilt once at the end.
+
+Usage: python -m benchmarks.bench_product_import [--products 200000] [--per-row 5000]
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import tempfile
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=200000, help="Rows per bulk import")
+    parser.add_argument("--per-row", type=int, default=5000, help="Rows loaded one by one (extrapolated)")
+    return parser.parse_args()
+
+def catalog_csv(count: int, rng: random.Random) -> bytes:
+    words = ["oak", "steel", "lamp", "chair", "desk", "shelf", "brass", "linen", "wool", "table", "rug", "vase"]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["id", "name", "description", "price", "stock", "category", "image_url"])
+    for index in range(count):
+        writer.writerow([
+            index + 1,
+            f"{rng.choice(words).title()} {rng.choice(words)} {index}",
+            " ".join(rng.choices(words, k=20)),
+            round(rng.uniform(1, 500), 2),
+            rng.randint(0, 100),
+            rng.choice(["home", "office", "garden", "kitchen"]),
+            "",
+        ])
+    return buffer.getvalue().encode("utf-8")
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = os.path.join(workdir, "bench.db")
+    os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "60000")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from core.config import settings
+    from core.database import close_pool, init_database
+    from products.bulk_import import import_products_from_file
+    from products.utils import create_product, get_product_by_id
+
+    init_database()
+    rng = random.Random(7)
+
+    started = time.perf_counter()
+    for index in range(args.per_row):
+        product_id = create_product(f"Row {index}", "one at a time", 10.0, 5, "home")
+        get_product_by_id(product_id)
+    per_row_rate = args.per_row / (time.perf_counter() - started)
+
+    print(f"{'mode':<16} {'rows':>8} {'seconds':>9} {'rows/s':>10}")
+    print(f"{'per-row':<16} {args.per_row:>8} {args.per_row / per_row_rate:>9.1f} {per_row_rate:>10.0f}")
+    print(f"{'  extrapolated':<16} {args.products:>8} {args.products / per_row_rate:>9.1f}")
+
+    payload = catalog_csv(args.products, rng)
+    for label, fresh, deferred in (
+        ("import", True, False),
+        ("re-import", False, False),
+        ("deferred index", True, True),
+    ):
+        if fresh:
+            close_pool()
+            settings.DATABASE_URL = os.path.join(workdir, f"{label.replace(' ', '_')}.db")
+            init_database()
+        started = time.perf_counter()
+        report = import_products_from_file(io.BytesIO(payload), "csv", defer_index=deferred)
+        seconds = time.perf_counter() - started
+        print(f"{label:<16} {report['rows']:>8} {seconds:>9.1f} {report['rows'] / seconds:>10.0f}")
+    close_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Product search latency: LIKE scans vs the FTS5 index.
+
+Builds catalogs of synthetic products through the real migrations (so the
+FTS sync triggers run during the load) and times one search request, the
+first page plus the total count, for a few query shapes. ``like`` is the
+previous implementation: ``name LIKE '%kw%' OR description LIKE '%kw%'``
+ordered by ``created_at``. ``fts`` is the current ``search_products`` and
+``get_total_products_count_filtered`` pair.
+
+Usage: python -m benchmarks.bench_search [--products 100000 1000000] [--repeat 5]
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+
+LIKE_PAGE = '''
+    SELECT id, name, description, price, stock, category, image_url, created_at, updated_at
+    FROM products
+    WHERE name LIKE ? OR description LIKE ?
+    ORDER BY created_at DESC
+    LIMIT ? OFFSET ?
+'''
+LIKE_COUNT = "SELECT COUNT(*) FROM products WHERE (name LIKE ? OR description LIKE ?)"
+
+CATEGORIES = ["books", "garden", "kitchen", "outdoor", "sports", "toys", "audio", "office"]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, nargs="+", default=[100000, 1000000], help="Catalog sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query, the median is reported")
+    parser.add_argument("--page-size", type=int, default=20)
+    return parser.parse_args()
+
+def vocabulary(size: int, rng: random.Random) -> list:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(4, 9))))
+    words = sorted(words)
+    rng.shuffle(words)
+    return words
+
+def populate(conn, count: int, words: list, rng: random.Random) -> float:
+    # Zipf-like word frequencies: a few words are common, most are rare
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+
+    def rows():
+        for _ in range(count):
+            yield (
+                " ".join(rng.choices(words, cum_weights=cum_weights, k=3)).title(),
+                " ".join(rng.choices(words, cum_weights=cum_weights, k=25)),
+                round(rng.uniform(1, 500), 2),
+                rng.randint(0, 100),
+                rng.choice(CATEGORIES),
+            )
+
+    started = time.perf_counter()
+    conn.executemany(
+        "INSERT INTO products (name, description, price, stock, category) VALUES (?, ?, ?, ?, ?)",
+        rows()
+    )
+    conn.commit()
+    return time.perf_counter() - started
+
+def median_ms(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = os.path.join(workdir, "bench.db")
+    # The LIKE scans are slow queries by design; keep their log lines out of the table
+    os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "60000")
+
+    from core.config import settings
+    from core.database import close_pool, database_connection, init_database
+    from products.utils import get_total_products_count_filtered, search_products
+
+    rng = random.Random(42)
+    words = vocabulary(5000, rng)
+    queries = {
+        "common word": words[20],
+        "rare word": words[3000],
+        "two words": f"{words[5]} {words[40]}",
+        "phrase": f'"{words[2]} {words[3]}"',
+        "prefix": words[100][:4] + "*",
+    }
+
+    print(f"{'products':>9} {'query':<12} {'matches':>8} {'like ms':>9} {'fts ms':>9} {'speedup':>8}")
+    for count in args.products:
+        close_pool()
+        settings.DATABASE_URL = os.path.join(workdir, f"products_{count}.db")
+        init_database()
+        with database_connection() as conn:
+            load_seconds = populate(conn, count, words, rng)
+        print(f"{count:>9} loaded in {load_seconds:.1f}s including FTS triggers")
+
+        for label, keyword in queries.items():
+            pattern = f"%{keyword.rstrip('*')}%"
+
+            def like():
+                with database_connection() as conn:
+                    conn.execute(LIKE_PAGE, (pattern, pattern, args.page_size, 0)).fetchall()
+                    conn.execute(LIKE_COUNT, (pattern, pattern)).fetchone()
+
+            def fts():
+                search_products(keyword, limit=args.page_size, offset=0)
+                return get_total_products_count_filtered(search_keyword=keyword)
+
+            matches = fts()
+            like_ms = median_ms(like, args.repeat)
+            fts_ms = median_ms(fts, args.repeat)
+            print(
+                f"{count:>9} {label:<12} {matches:>8} {like_ms:>9.1f} {fts_ms:>9.1f} "
+                f"{like_ms / fts_ms if fts_ms else float('inf'):>7.1f}x"
+            )
+    close_pool()
+
+if __name__ == "__main__":
+    main()
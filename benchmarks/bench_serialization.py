@@ -0,0 +1,135 @@
+"""Listing throughput: per-row Pydantic models vs the orjson fast path.
+
+Serves ``GET /products`` in-process at a few page sizes, through httpx's
+ASGI transport on one event loop so that client overhead stays small. ``models`` is the
+previous handler body: one ``PublicProductResponse`` per row, with the page
+model then validated and serialized again by FastAPI through the
+``response_model``. ``fast`` is the current route, which maps rows to dicts
+and returns an orjson response. Both read the same data with the same
+queries, and the caches are warm, so the difference is serialization.
+
+Usage: python -m benchmarks.bench_serialization [--products 5000] [--requests 500]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=5000, help="Catalog size")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 100], help="page_size values")
+    return parser.parse_args()
+
+def build_app():
+    from typing import Optional
+    from fastapi import FastAPI, Query, Request, Response
+    from core.http_cache import conditional_response
+    from products import public_routes
+    from products.public_routes import PublicProductListResponse, PublicProductResponse, catalog_etag
+    from products.utils import (
+        encode_cursor,
+        get_catalog_version_async,
+        get_products_filtered_async,
+        get_total_products_count_filtered_async
+    )
+
+    app = FastAPI()
+    app.include_router(public_routes.router, prefix="/products")
+
+    @app.get("/legacy/products", response_model=PublicProductListResponse)
+    async def legacy_products(
+        request: Request,
+        response: Response,
+        category: Optional[str] = Query(None),
+        min_price: Optional[float] = Query(None, ge=0),
+        max_price: Optional[float] = Query(None, ge=0),
+        sort_by: Optional[str] = Query("created_at"),
+        page: int = Query(1, ge=1),
+        page_size: int = Query(10, ge=1, le=100),
+        cursor: Optional[str] = Query(None),
+        include_total: bool = Query(True)
+    ):
+        # Same parameters as the real route: FastAPI's per-parameter work is not negligible
+        generation, last_modified = await get_catalog_version_async()
+        conditional_response(request, response, catalog_etag(generation), last_modified)
+        products = await get_products_filtered_async(sort_by=sort_by, limit=page_size + 1, offset=(page - 1) * page_size)
+        next_cursor = None
+        if len(products) > page_size:
+            products = products[:page_size]
+            next_cursor = encode_cursor("created_at", products[-1])
+        total_count = await get_total_products_count_filtered_async(generation=generation)
+        product_responses = []
+        for product in products:
+            product_responses.append(PublicProductResponse(
+                id=product[0],
+                name=product[1],
+                description=product[2],
+                price=product[3],
+                stock=product[4],
+                category=product[5],
+                image_url=product[6]
+            ))
+        return PublicProductListResponse(
+            products=product_responses,
+            total=total_count,
+            page=page,
+            page_size=page_size,
+            total_pages=(total_count + page_size - 1) // page_size,
+            has_more=next_cursor is not None,
+            next_cursor=next_cursor
+        )
+
+    return app
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = os.path.join(workdir, "bench.db")
+    os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "60000")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    import httpx
+    from core.database import close_pool, database_connection, init_database
+
+    init_database()
+    rng = random.Random(3)
+    words = ["oak", "steel", "lamp", "chair", "desk", "shelf", "brass", "linen", "wool", "table", "rug", "vase"]
+    with database_connection() as conn:
+        conn.executemany(
+            "INSERT INTO products (name, description, price, stock, category, image_url) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (f"Product {index}", " ".join(rng.choices(words, k=30)), round(rng.uniform(1, 500), 2),
+                 rng.randint(0, 100), "home", f"https://cdn.example.com/p/{index}.jpg")
+                for index in range(args.products)
+            )
+        )
+        conn.commit()
+
+    async def requests_per_second(client, url: str, page_size: int) -> float:
+        params = {"page_size": page_size}
+        assert (await client.get(url, params=params)).status_code == 200
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            await client.get(url, params=params)
+        return args.requests / (time.perf_counter() - started)
+
+    async def run():
+        print(f"{'page_size':>9} {'mode':<8} {'req/s':>9} {'ms/req':>8} {'speedup':>8}")
+        transport = httpx.ASGITransport(app=build_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for page_size in args.page_sizes:
+                rates = {}
+                for label, url in (("models", "/legacy/products"), ("fast", "/products")):
+                    rates[label] = await requests_per_second(client, url, page_size)
+                    speedup = f"{rates[label] / rates['models']:>7.2f}x"
+                    print(f"{page_size:>9} {label:<8} {rates[label]:>9.0f} {1000 / rates[label]:>8.2f} {speedup:>8}")
+
+    asyncio.run(run())
+    close_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Signin throughput with other endpoints running at the same time.
+
+Starts a uvicorn worker against a scratch database, creates one account,
+then runs two groups of client threads for a fixed duration:
+
+* signin clients posting to ``/auth/signin`` as fast as they can
+* browse clients fetching ``GET /products``
+
+It reports signins per second and the latency of ``GET /products``, first
+with no signin load and then during the signin storm. While bcrypt ran on
+the event loop, every signin froze the browse requests for the full hash
+time. With the process pool they stay in the low milliseconds.
+
+Usage: python -m benchmarks.bench_signin [--seconds 10] [--signin-clients 8]
+       [--browse-clients 4] [--rounds 12] [--workers N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10, help="Duration of each phase")
+    parser.add_argument("--signin-clients", type=int, default=8, help="Concurrent signin clients")
+    parser.add_argument("--browse-clients", type=int, default=4, help="Concurrent GET /products clients")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt work factor")
+    parser.add_argument("--workers", type=int, default=None, help="Password hashing processes")
+    parser.add_argument("--port", type=int, default=8766, help="Port for the uvicorn worker")
+    return parser.parse_args()
+
+def request(base: str, path: str, payload: dict = None) -> int:
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(base + path, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def wait_until_ready(base: str, timeout: float = 30.0) -> None:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            if request(base, "/products") == 200:
+                return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.05)
+    raise RuntimeError(f"Worker did not answer within {timeout} seconds")
+
+def run_phase(base: str, seconds: float, signin_clients: int, browse_clients: int):
+    deadline = time.perf_counter() + seconds
+    signins = []
+    latencies = []
+    lock = threading.Lock()
+
+    def signin_loop():
+        while time.perf_counter() < deadline:
+            status = request(base, "/auth/signin", {"email": EMAIL, "password": PASSWORD})
+            with lock:
+                signins.append(status)
+
+    def browse_loop():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            request(base, "/products")
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=signin_loop) for _ in range(signin_clients)]
+    threads += [threading.Thread(target=browse_loop) for _ in range(browse_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return signins, sorted(latencies)
+
+def report(label: str, signins: list, latencies: list, seconds: float) -> None:
+    ok = sum(1 for status in signins if status == 200)
+    busy = sum(1 for status in signins if status == 503)
+    p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+    print(f"{label:<18} signin/s {ok / seconds:7.1f}   503s {busy:5d}   "
+          f"GET /products p50 {statistics.median(latencies) * 1000:7.1f} ms   p99 {p99 * 1000:7.1f} ms")
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        PYTHONPATH=str(PROJECT_ROOT),
+        DATABASE_URL=os.path.join(workdir, "bench.db"),
+        DEBUG="",
+        LOG_LEVEL="WARNING",
+        BCRYPT_ROUNDS=str(args.rounds)
+    )
+    if args.workers:
+        env["PASSWORD_HASH_WORKERS"] = str(args.workers)
+
+    base = f"http://127.0.0.1:{args.port}"
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_ready(base)
+        request(base, "/auth/signup", {"name": "bench", "email": EMAIL, "password": PASSWORD})
+
+        _, idle = run_phase(base, args.seconds, 0, args.browse_clients)
+        report("browse only", [], idle, args.seconds)
+        signins, loaded = run_phase(base, args.seconds, args.signin_clients, args.browse_clients)
+        report("signin + browse", signins, loaded, args.seconds)
+    finally:
+        worker.terminate()
+        worker.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Worker cold-start benchmark.
+
+Measures two numbers in fresh interpreter processes:
+
+* import time: how long ``import main`` takes
+* time to first request: from spawning a uvicorn worker until
+  ``GET /products`` first answers 200
+
+The first uvicorn run starts against an empty database and has to apply
+every migration. Later runs find the schema current and skip all DDL.
+Track these numbers when changing imports or startup code.
+
+Usage: python -m benchmarks.bench_startup [--runs 5] [--port 8765]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Measurements per scenario")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the uvicorn worker")
+    return parser.parse_args()
+
+def measure_import(env: dict, workdir: str) -> float:
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=workdir, env=env,
+        capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+def measure_first_request(env: dict, workdir: str, port: int, timeout: float = 30.0) -> float:
+    url = f"http://127.0.0.1:{port}/products"
+    started = time.perf_counter()
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.005)
+        raise RuntimeError(f"Worker did not answer within {timeout} seconds")
+    finally:
+        worker.terminate()
+        worker.wait()
+
+def report(label: str, samples: list) -> None:
+    print(f"{label:<32} median {statistics.median(samples) * 1000:8.1f} ms"
+          f"   min {min(samples) * 1000:8.1f} ms   max {max(samples) * 1000:8.1f} ms")
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp()
+    # Run from a scratch directory so log files and the database stay out of the tree
+    env = dict(
+        os.environ,
+        PYTHONPATH=str(PROJECT_ROOT),
+        DATABASE_URL=os.path.join(workdir, "bench.db"),
+        DEBUG="",
+        LOG_LEVEL="WARNING"
+    )
+
+    report("import main", [measure_import(env, workdir) for _ in range(args.runs)])
+    report("first request (empty database)", [measure_first_request(env, workdir, args.port)])
+    report("first request (schema current)",
+           [measure_first_request(env, workdir, args.port) for _ in range(args.runs)])
+
+if __name__ == "__main__":
+    main()
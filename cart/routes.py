@@ -2,12 +2,13 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from pydantic import BaseModel
 from typing import List, Optional
 from auth.utils import get_current_user
+from core.serialization import json_response, rows_as_dicts
 from .utils import (
-    add_to_cart,
-    get_cart_items,
-    remove_from_cart,
-    update_cart_quantity,
-    get_cart_total
+    add_to_cart_async,
+    get_cart_items_async,
+    remove_from_cart_async,
+    update_cart_quantity_async,
+    get_cart_total_async
 )
 
 router = APIRouter()
@@ -33,6 +34,8 @@ class CartResponse(BaseModel):
     total_items: int
     total_amount: float
 
+CART_ITEM_FIELDS = tuple(CartItemResponse.model_fields)
+
 @router.post("", response_model=dict)
 async def add_to_cart_api(
     request: AddToCartRequest,
@@ -46,7 +49,7 @@ async def add_to_cart_api(
                 detail="Quantity must be greater than 0"
             )
         
-        success = add_to_cart(
+        success = await add_to_cart_async(
             user_id=current_user["id"],
             product_id=request.product_id,
             quantity=request.quantity
@@ -74,29 +77,14 @@ async def view_cart_api(
 ):
     """View cart items (User only)"""
     try:
-        cart_items = get_cart_items(current_user["id"])
-        total_amount = get_cart_total(current_user["id"])
-        
-        # Convert to response format
-        items_response = []
-        total_items = 0
+        cart_items = await get_cart_items_async(current_user["id"])
+        total_amount = await get_cart_total_async(current_user["id"])
         
-        for item in cart_items:
-            items_response.append(CartItemResponse(
-                product_id=item[0],
-                product_name=item[1],
-                product_price=item[2],
-                quantity=item[3],
-                subtotal=item[4],
-                image_url=item[5]
-            ))
-            total_items += item[3]
-        
-        return CartResponse(
-            items=items_response,
-            total_items=total_items,
-            total_amount=total_amount
-        )
+        return json_response({
+            "items": rows_as_dicts(cart_items, CART_ITEM_FIELDS),
+            "total_items": sum(item[3] for item in cart_items),
+            "total_amount": total_amount
+        })
     
     except Exception as e:
         raise HTTPException(
@@ -111,7 +99,7 @@ async def remove_from_cart_api(
 ):
     """Remove item from cart (User only)"""
     try:
-        success = remove_from_cart(
+        success = await remove_from_cart_async(
             user_id=current_user["id"],
             product_id=product_id
         )
@@ -146,7 +134,7 @@ async def update_cart_quantity_api(
                 detail="Quantity must be greater than 0"
             )
         
-        success = update_cart_quantity(
+        success = await update_cart_quantity_async(
             user_id=current_user["id"],
             product_id=product_id,
             quantity=request.quantity
@@ -3,10 +3,10 @@ from pydantic import BaseModel
 from typing import List, Optional
 from auth.utils import get_current_user
 from .utils import (
-    create_order,
-    process_dummy_payment
+    create_order_async,
+    process_dummy_payment_async
 )
-from cart.utils import get_cart_items, get_cart_total, clear_cart
+from cart.utils import get_cart_items_async, get_cart_total_async, clear_cart_async
 
 router = APIRouter()
 
@@ -28,17 +28,17 @@ async def checkout_api(
     """Process checkout with dummy payment (User only)"""
     try:
         # Get cart items
-        cart_items = get_cart_items(current_user["id"])
+        cart_items = await get_cart_items_async(current_user["id"])
         if not cart_items:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Cart is empty"
             )
         
-        total_amount = get_cart_total(current_user["id"])
+        total_amount = await get_cart_total_async(current_user["id"])
         
         # Process dummy payment
-        payment_success = process_dummy_payment(total_amount)
+        payment_success = await process_dummy_payment_async(total_amount)
         if not payment_success:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -46,7 +46,7 @@ async def checkout_api(
             )
         
         # Create order
-        order_id = create_order(
+        order_id = await create_order_async(
             user_id=current_user["id"],
             cart_items=cart_items,
             total_amount=total_amount,
@@ -55,7 +55,7 @@ async def checkout_api(
         )
         
         # Clear cart after successful order
-        clear_cart(current_user["id"])
+        await clear_cart_async(current_user["id"])
         
         return CheckoutResponse(
             order_id=order_id,
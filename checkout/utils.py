@@ -1,10 +1,11 @@
+import asyncio
 import sqlite3
 import random
 import time
 from datetime import datetime
 from typing import Optional, List, Tuple
-from products.utils import get_product_by_id, update_product
-from core.database import get_database_connection
+from products.utils import invalidate_cached_product
+from core.database import database_connection, awaitable
 from core.config import settings
 from core.logging import get_logger
 
@@ -16,23 +17,30 @@ def init_checkout_db():
     # This function is now handled by core.database.init_database()
     pass
 
+def _payment_approved(amount: float) -> bool:
+    # Simulate payment success/failure (configurable success rate)
+    if random.random() < settings.DUMMY_PAYMENT_SUCCESS_RATE:
+        logger.info("Payment successful for amount: $%s", amount)
+        return True
+    logger.warning("Payment failed for amount: $%s", amount)
+    return False
+
 def process_dummy_payment(amount: float) -> bool:
     """Process dummy payment - simulates payment processing"""
-    try:
-        logger.debug(f"Processing dummy payment for amount: ${amount}")
-        # Simulate payment processing time
-        time.sleep(0.1)
-        
-        # Simulate payment success/failure (configurable success rate)
-        if random.random() < settings.DUMMY_PAYMENT_SUCCESS_RATE:
-            logger.info(f"Payment successful for amount: ${amount}")
-            return True
-        else:
-            logger.warning(f"Payment failed for amount: ${amount}")
-            return False
-    except Exception as e:
-        logger.error(f"Payment processing error: {e}")
-        return False
+    logger.debug("Processing dummy payment for amount: $%s", amount)
+    # Simulate payment processing time
+    time.sleep(0.1)
+    return _payment_approved(amount)
+
+async def process_dummy_payment_async(amount: float) -> bool:
+    """Process dummy payment on the event loop.
+
+    The simulated gateway call does no database work, so it must not hold a
+    database executor thread while it waits.
+    """
+    logger.debug("Processing dummy payment for amount: $%s", amount)
+    await asyncio.sleep(0.1)
+    return _payment_approved(amount)
 
 def create_order(
     user_id: int,
@@ -42,220 +50,226 @@ def create_order(
     payment_method: str
 ) -> int:
     """Create a new order from cart items"""
-    logger.info(f"Creating order for user {user_id} with {len(cart_items)} items")
-    conn = get_database_connection()
-    cursor = conn.cursor()
+    logger.info("Creating order for user %s with %s items", user_id, len(cart_items))
+    with database_connection() as conn:
+        cursor = conn.cursor()
     
-    try:
-        # Create order
-        cursor.execute('''
-            INSERT INTO orders (user_id, total_amount, shipping_address, payment_method, order_status)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, total_amount, shipping_address, payment_method, 'confirmed'))
+        try:
+            # Create order
+            cursor.execute('''
+                INSERT INTO orders (user_id, total_amount, shipping_address, payment_method, order_status)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (user_id, total_amount, shipping_address, payment_method, 'confirmed'))
         
-        order_id = cursor.lastrowid
-        logger.debug(f"Created order with ID: {order_id}")
+            order_id = cursor.lastrowid
+            logger.debug("Created order with ID: %s", order_id)
         
-        # Create order items and update product stock
-        for item in cart_items:
-            try:
-                product_id, product_name, product_price, quantity, subtotal, image_url = item
+            # Create order items and update product stock
+            for item in cart_items:
+                try:
+                    product_id, product_name, product_price, quantity, subtotal, image_url = item
                 
-                # Insert order item
-                cursor.execute('''
-                    INSERT INTO order_items (order_id, product_id, product_name, product_price, quantity, subtotal)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (order_id, product_id, product_name, product_price, quantity, subtotal))
+                    # Insert order item
+                    cursor.execute('''
+                        INSERT INTO order_items (order_id, product_id, product_name, product_price, quantity, subtotal)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    ''', (order_id, product_id, product_name, product_price, quantity, subtotal))
                 
-                # Update product stock within the same transaction
-                cursor.execute('''
-                    UPDATE products SET stock = stock - ? WHERE id = ?
-                ''', (quantity, product_id))
+                    # Update product stock within the same transaction
+                    cursor.execute('''
+                        UPDATE products SET stock = stock - ? WHERE id = ?
+                    ''', (quantity, product_id))
                 
-                logger.debug(f"Added item to order: {product_name} (qty: {quantity})")
+                    logger.debug("Added item to order: %s (qty: %s)", product_name, quantity)
                 
-            except Exception as item_error:
-                logger.error(f"Error processing cart item: {item_error}")
-                raise item_error
+                except Exception as item_error:
+                    logger.error("Error processing cart item: %s", item_error)
+                    raise item_error
         
-        conn.commit()
-        logger.info(f"Order {order_id} created successfully")
-        return order_id
+            conn.commit()
+            for item in cart_items:
+                invalidate_cached_product(item[0])
+            logger.info("Order %s created successfully", order_id)
+            return order_id
         
-    except Exception as e:
-        conn.rollback()
-        logger.error(f"Error creating order: {e}")
-        raise e
-    finally:
-        conn.close()
+        except Exception as e:
+            conn.rollback()
+            logger.error("Error creating order: %s", e)
+            raise e
 
 def get_order_by_id(order_id: int) -> Optional[Tuple]:
     """Get order by ID"""
-    logger.debug(f"Fetching order by ID: {order_id}")
-    conn = get_database_connection()
-    cursor = conn.cursor()
+    logger.debug("Fetching order by ID: %s", order_id)
+    with database_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute('''
-        SELECT id, user_id, total_amount, shipping_address, payment_method, order_status, created_at
-        FROM orders
-        WHERE id = ?
-    ''', (order_id,))
+        cursor.execute('''
+            SELECT id, user_id, total_amount, shipping_address, payment_method, order_status, created_at
+            FROM orders
+            WHERE id = ?
+        ''', (order_id,))
     
-    order = cursor.fetchone()
-    conn.close()
+        order = cursor.fetchone()
     
     if order:
-        logger.debug(f"Found order {order_id}")
+        logger.debug("Found order %s", order_id)
     else:
-        logger.debug(f"Order {order_id} not found")
+        logger.debug("Order %s not found", order_id)
     
     return order
 
 def get_user_orders(user_id: int) -> List[Tuple]:
     """Get all orders for a user"""
-    logger.debug(f"Fetching orders for user: {user_id}")
-    conn = get_database_connection()
-    cursor = conn.cursor()
+    logger.debug("Fetching orders for user: %s", user_id)
+    with database_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute('''
-        SELECT id, user_id, total_amount, shipping_address, payment_method, order_status, created_at
-        FROM orders
-        WHERE user_id = ?
-        ORDER BY created_at DESC
-    ''', (user_id,))
+        cursor.execute('''
+            SELECT id, user_id, total_amount, shipping_address, payment_method, order_status, created_at
+            FROM orders
+            WHERE user_id = ?
+            ORDER BY created_at DESC
+        ''', (user_id,))
     
-    orders = cursor.fetchall()
-    conn.close()
+        orders = cursor.fetchall()
     
-    logger.debug(f"Found {len(orders)} orders for user {user_id}")
+    logger.debug("Found %s orders for user %s", len(orders), user_id)
     return orders
 
 def get_order_items(order_id: int) -> List[Tuple]:
     """Get all items for a specific order"""
-    logger.debug(f"Fetching items for order: {order_id}")
-    conn = get_database_connection()
-    cursor = conn.cursor()
+    logger.debug("Fetching items for order: %s", order_id)
+    with database_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute('''
-        SELECT id, product_id, product_name, product_price, quantity, subtotal
-        FROM order_items
-        WHERE order_id = ?
-        ORDER BY id
-    ''', (order_id,))
+        cursor.execute('''
+            SELECT id, product_id, product_name, product_price, quantity, subtotal
+            FROM order_items
+            WHERE order_id = ?
+            ORDER BY id
+        ''', (order_id,))
     
-    items = cursor.fetchall()
-    conn.close()
+        items = cursor.fetchall()
     
-    logger.debug(f"Found {len(items)} items for order {order_id}")
+    logger.debug("Found %s items for order %s", len(items), order_id)
     return items
 
 def update_order_status(order_id: int, status: str) -> bool:
     """Update order status"""
-    logger.info(f"Updating order {order_id} status to: {status}")
+    logger.info("Updating order %s status to: %s", order_id, status)
     valid_statuses = ['pending', 'confirmed', 'shipped', 'delivered', 'cancelled']
     if status not in valid_statuses:
-        logger.warning(f"Invalid order status: {status}")
+        logger.warning("Invalid order status: %s", status)
         return False
     
-    conn = get_database_connection()
-    cursor = conn.cursor()
+    with database_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute('''
-        UPDATE orders SET order_status = ? WHERE id = ?
-    ''', (status, order_id))
+        cursor.execute('''
+            UPDATE orders SET order_status = ? WHERE id = ?
+        ''', (status, order_id))
     
-    success = cursor.rowcount > 0
-    conn.commit()
-    conn.close()
+        success = cursor.rowcount > 0
+        conn.commit()
     
     if success:
-        logger.info(f"Order {order_id} status updated to {status}")
+        logger.info("Order %s status updated to %s", order_id, status)
     else:
-        logger.warning(f"Failed to update order {order_id} status")
+        logger.warning("Failed to update order %s status", order_id)
     
     return success
 
 def get_order_total(order_id: int) -> float:
     """Get total amount for an order"""
-    logger.debug(f"Fetching total for order: {order_id}")
-    conn = get_database_connection()
-    cursor = conn.cursor()
+    logger.debug("Fetching total for order: %s", order_id)
+    with database_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute('''
-        SELECT total_amount FROM orders WHERE id = ?
-    ''', (order_id,))
+        cursor.execute('''
+            SELECT total_amount FROM orders WHERE id = ?
+        ''', (order_id,))
     
-    result = cursor.fetchone()
-    conn.close()
+        result = cursor.fetchone()
     
     total = result[0] if result else 0.0
-    logger.debug(f"Order {order_id} total: ${total}")
+    logger.debug("Order %s total: $%s", order_id, total)
     return total
 
 def get_order_count(user_id: int) -> int:
     """Get total number of orders for a user"""
-    logger.debug(f"Fetching order count for user: {user_id}")
-    conn = get_database_connection()
-    cursor = conn.cursor()
+    logger.debug("Fetching order count for user: %s", user_id)
+    with database_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute('''
-        SELECT COUNT(*) FROM orders WHERE user_id = ?
-    ''', (user_id,))
+        cursor.execute('''
+            SELECT COUNT(*) FROM orders WHERE user_id = ?
+        ''', (user_id,))
     
-    count = cursor.fetchone()[0]
-    conn.close()
+        count = cursor.fetchone()[0]
     
-    logger.debug(f"User {user_id} has {count} orders")
+    logger.debug("User %s has %s orders", user_id, count)
     return count
 
 def cancel_order(order_id: int, user_id: int) -> bool:
     """Cancel an order and restore product stock"""
-    logger.info(f"Attempting to cancel order {order_id} for user {user_id}")
-    conn = get_database_connection()
-    cursor = conn.cursor()
+    logger.info("Attempting to cancel order %s for user %s", order_id, user_id)
+    with database_connection() as conn:
+        cursor = conn.cursor()
     
-    try:
-        # Check if order exists and belongs to user
-        cursor.execute('''
-            SELECT order_status FROM orders 
-            WHERE id = ? AND user_id = ?
-        ''', (order_id, user_id))
+        try:
+            # Check if order exists and belongs to user
+            cursor.execute('''
+                SELECT order_status FROM orders 
+                WHERE id = ? AND user_id = ?
+            ''', (order_id, user_id))
         
-        order = cursor.fetchone()
-        if not order:
-            logger.warning(f"Order {order_id} not found or doesn't belong to user {user_id}")
-            return False
+            order = cursor.fetchone()
+            if not order:
+                logger.warning("Order %s not found or doesn't belong to user %s", order_id, user_id)
+                return False
         
-        if order[0] in ['shipped', 'delivered']:
-            logger.warning(f"Cannot cancel order {order_id} - status is {order[0]}")
-            return False
+            if order[0] in ['shipped', 'delivered']:
+                logger.warning("Cannot cancel order %s - status is %s", order_id, order[0])
+                return False
         
-        # Get order items to restore stock
-        order_items = get_order_items(order_id)
+            # Get order items to restore stock, on this connection: going through
+            # get_order_items would hold a second pooled connection per cancel
+            cursor.execute('''
+                SELECT product_id, quantity FROM order_items WHERE order_id = ? ORDER BY id
+            ''', (order_id,))
+            order_items = cursor.fetchall()
         
-        # Restore product stock
-        for item in order_items:
-            product_id = item[1]
-            quantity = item[4]
-            
-            product = get_product_by_id(product_id)
-            if product:
-                new_stock = product[4] + quantity
-                update_product(product_id=product_id, stock=new_stock)
-                logger.debug(f"Restored {quantity} units to product {product_id}")
+            # Restore product stock in the same transaction; an increment in SQL
+            # cannot lose concurrent stock changes the way read-modify-write can
+            for product_id, quantity in order_items:
+                cursor.execute('''
+                    UPDATE products SET stock = stock + ? WHERE id = ?
+                ''', (quantity, product_id))
+                if cursor.rowcount:
+                    logger.debug("Restored %s units to product %s", quantity, product_id)
         
-        # Update order status to cancelled
-        cursor.execute('''
-            UPDATE orders SET order_status = 'cancelled' WHERE id = ?
-        ''', (order_id,))
+            # Update order status to cancelled
+            cursor.execute('''
+                UPDATE orders SET order_status = 'cancelled' WHERE id = ?
+            ''', (order_id,))
         
-        conn.commit()
-        logger.info(f"Order {order_id} cancelled successfully")
-        return True
+            conn.commit()
+            for product_id, _ in order_items:
+                invalidate_cached_product(product_id)
+            logger.info("Order %s cancelled successfully", order_id)
+            return True
         
-    except Exception as e:
-        conn.rollback()
-        logger.error(f"Error cancelling order {order_id}: {e}")
-        return False
-    finally:
-        conn.close() 
\ No newline at end of file
+        except Exception as e:
+            conn.rollback()
+            logger.error("Error cancelling order %s: %s", order_id, e)
+            return False 
+
+# Awaitable variants for the async route handlers
+create_order_async = awaitable(create_order)
+get_order_by_id_async = awaitable(get_order_by_id)
+get_user_orders_async = awaitable(get_user_orders)
+get_order_items_async = awaitable(get_order_items)
+update_order_status_async = awaitable(update_order_status)
+get_order_total_async = awaitable(get_order_total)
+get_order_count_async = awaitable(get_order_count)
+cancel_order_async = awaitable(cancel_order)
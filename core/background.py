@@ -0,0 +1,57 @@
+"""Periodic maintenance jobs running on the event loop.
+
+Jobs are plain blocking functions (usually database work). Each one runs
+every ``interval`` seconds, from the time the application starts until it
+shuts down, in the database executor unless the job brings its own. A
+failing run is logged and the job keeps its schedule.
+"""
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable, List, Optional
+from core.database import run_in_db_executor
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_jobs: List[tuple] = []
+_tasks: List[asyncio.Task] = []
+
+def register_periodic(
+    name: str,
+    interval: float,
+    func: Callable[[], object],
+    executor: Optional[Executor] = None
+) -> None:
+    """Schedule ``func`` to run every ``interval`` seconds once started.
+
+    Jobs that block on something other than the database (network I/O)
+    should pass their own ``executor`` so they never hold a database thread.
+    """
+    _jobs.append((name, interval, func, executor))
+
+async def _run_periodically(
+    name: str, interval: float, func: Callable[[], object], executor: Optional[Executor]
+) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if executor is None:
+                await run_in_db_executor(func)
+            else:
+                await loop.run_in_executor(executor, func)
+        except Exception as e:
+            logger.error("Periodic job %s failed: %s", name, e)
+
+def start_periodic_jobs() -> None:
+    """Start every registered job on the running event loop"""
+    for name, interval, func, executor in _jobs:
+        logger.debug("Starting periodic job %s every %ss", name, interval)
+        _tasks.append(asyncio.create_task(_run_periodically(name, interval, func, executor), name=name))
+
+async def stop_periodic_jobs() -> None:
+    """Cancel the running jobs and wait for them to finish"""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
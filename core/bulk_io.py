@@ -0,0 +1,119 @@
+"""Streaming CSV / NDJSON input for bulk import endpoints and CLIs.
+
+Uploads are spooled to a temporary file (in memory up to
+BULK_SPOOL_MEMORY_BYTES, then on disk) and parsed record by record, so an
+import never holds the whole payload or all parsed rows in memory.
+"""
+import csv
+import io
+import json
+import tempfile
+import time
+from itertools import islice
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
+from fastapi import HTTPException, Request, status
+from core.config import settings
+
+T = TypeVar("T")
+
+FORMATS = ("csv", "ndjson")
+
+# Counter incremented by each kind of per-line issue
+ISSUE_COUNTERS = {"error": "errors", "conflict": "conflicts"}
+
+class RecordError(ValueError):
+    """A line that could not be parsed into a record"""
+
+class ImportReport:
+    """Outcome counters plus the first BULK_IMPORT_MAX_REPORTED_ISSUES per-line issues"""
+
+    def __init__(self, *counters: str):
+        self.rows = 0
+        self.counters: Dict[str, int] = dict.fromkeys(counters + ("errors",), 0)
+        self.issues: List[dict] = []
+        self.started = time.perf_counter()
+
+    def add(self, counter: str, amount: int = 1) -> None:
+        self.counters[counter] += amount
+
+    def issue(self, line: int, kind: str, detail: str, **fields) -> None:
+        self.add(ISSUE_COUNTERS[kind])
+        if len(self.issues) < settings.BULK_IMPORT_MAX_REPORTED_ISSUES:
+            self.issues.append({"line": line, **fields, "type": kind, "detail": detail})
+
+    def as_dict(self) -> dict:
+        seconds = time.perf_counter() - self.started
+        reported = sum(self.counters.get(counter, 0) for counter in ISSUE_COUNTERS.values())
+        return {
+            "rows": self.rows,
+            **self.counters,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.rows / seconds, 1) if seconds > 0 else None,
+            "issues": self.issues,
+            "issues_truncated": reported > len(self.issues)
+        }
+
+def detect_format(explicit: Optional[str], hint: Optional[str]) -> str:
+    """Pick the input format from an explicit choice, a content type or a file name"""
+    if explicit:
+        fmt = explicit.lower()
+    elif hint and ("ndjson" in hint or "jsonl" in hint or "json" in hint):
+        fmt = "ndjson"
+    else:
+        fmt = "csv"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}', expected one of {', '.join(FORMATS)}")
+    return fmt
+
+def iter_records(text: IO[str], fmt: str) -> Iterator[Tuple[int, Union[dict, RecordError]]]:
+    """Yield ``(line_number, record)`` pairs; unparsable lines yield a RecordError"""
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            if None in row:
+                yield reader.line_num, RecordError("Too many fields")
+            else:
+                yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, RecordError(f"Invalid JSON: {e.msg}")
+            continue
+        if isinstance(record, dict):
+            yield line_number, record
+        else:
+            yield line_number, RecordError("Expected a JSON object")
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Split an iterable into lists of at most ``size`` items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def open_text(binary: IO[bytes]) -> IO[str]:
+    """Wrap a binary stream for the CSV and JSON parsers (a UTF-8 BOM is skipped)"""
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+
+async def spool_request_body(request: Request) -> IO[bytes]:
+    """Copy a streamed request body into a rewound temporary file"""
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.BULK_SPOOL_MEMORY_BYTES)
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > settings.BULK_MAX_UPLOAD_BYTES:
+            spool.close()
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Upload exceeds {settings.BULK_MAX_UPLOAD_BYTES} bytes"
+            )
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
@@ -0,0 +1,121 @@
+"""Bounded in-process caches with per-entry expiry."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+from core.metrics import registry
+
+cache_requests_total = registry.counter(
+    "cache_requests_total", "In-process cache lookups by result", ("cache", "result")
+)
+cache_evictions_total = registry.counter(
+    "cache_evictions_total", "Entries dropped to respect the cache size limit", ("cache",)
+)
+
+_MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Lookups are counted in ``cache_requests_total`` under the cache name so
+    the hit rate can be read from /metrics.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[Hashable, threading.Event] = {}
+        # Bumped by delete/clear so loads that raced a write are not stored
+        self._invalidations = 0
+
+    def _lookup(self, key: Hashable) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+        return _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._lookup(key)
+        if value is _MISSING:
+            cache_requests_total.inc(self.name, "miss")
+            return default
+        cache_requests_total.inc(self.name, "hit")
+        return value
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value or call ``loader`` to fill it.
+
+        Concurrent misses on one key call ``loader`` once; the other callers
+        wait for its result and are counted as ``coalesced``. A value loaded
+        while the key was invalidated is returned but not stored.
+        """
+        value = self._lookup(key)
+        if value is not _MISSING:
+            cache_requests_total.inc(self.name, "hit")
+            return value
+        with self._lock:
+            loading = self._loading.get(key)
+            if loading is None:
+                loading = self._loading[key] = threading.Event()
+                invalidations = self._invalidations
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            loading.wait()
+            value = self._lookup(key)
+            if value is not _MISSING:
+                cache_requests_total.inc(self.name, "coalesced")
+                return value
+            # The leader failed or its result was discarded: load for ourselves
+            cache_requests_total.inc(self.name, "miss")
+            return loader()
+
+        cache_requests_total.inc(self.name, "miss")
+        try:
+            value = loader()
+            with self._lock:
+                if self._invalidations == invalidations:
+                    self._store(key, value, self.ttl)
+            return value
+        finally:
+            with self._lock:
+                del self._loading[key]
+            loading.set()
+
+    def _store(self, key: Hashable, value: Any, ttl: float) -> None:
+        # Caller holds the lock
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            cache_evictions_total.inc(self.name)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._store(key, value, self.ttl if ttl is None else ttl)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
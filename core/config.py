@@ -8,26 +8,115 @@ load_dotenv()
 class Settings:
     # Database Configuration
     DATABASE_URL: str = os.getenv("DATABASE_URL", "auth.db")
-    
+
+    # Database Connection Pool Configuration
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_POOL_MAX_OVERFLOW: int = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_HEALTH_CHECK_SECONDS: float = float(os.getenv("DB_POOL_HEALTH_CHECK_SECONDS", "30"))
+    DB_BUSY_TIMEOUT_MS: int = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+    DB_CACHE_SIZE_KB: int = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+    DB_MMAP_SIZE: int = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+    DB_EXECUTOR_WORKERS: int = int(os.getenv("DB_EXECUTOR_WORKERS", "8"))
+
     # JWT Configuration
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
     RESET_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("RESET_TOKEN_EXPIRE_MINUTES", "15"))
+    RESET_TOKEN_SWEEP_SECONDS: float = float(os.getenv("RESET_TOKEN_SWEEP_SECONDS", "300"))
+    RESET_TOKEN_SWEEP_BATCH: int = int(os.getenv("RESET_TOKEN_SWEEP_BATCH", "500"))
+    RESET_TOKEN_SWEEP_PAUSE: float = float(os.getenv("RESET_TOKEN_SWEEP_PAUSE", "0.05"))
+    # Put id, name and role in access tokens and trust them instead of loading the user
+    AUTH_TRUSTED_CLAIMS: bool = os.getenv("AUTH_TRUSTED_CLAIMS", "False").lower() in ("1", "true", "yes")
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    USER_CACHE_TTL_SECONDS: float = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    # Decoded JWT payloads kept in memory; 0 disables the cache
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+    # Token Revocation Configuration
+    REVOCATION_BLOOM_CAPACITY: int = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+    REVOCATION_BLOOM_ERROR_RATE: float = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+    REVOCATION_SYNC_SECONDS: float = float(os.getenv("REVOCATION_SYNC_SECONDS", "2"))
+    REVOCATION_PRUNE_SECONDS: float = float(os.getenv("REVOCATION_PRUNE_SECONDS", "300"))
+
+    # Rate Limiting Configuration (token buckets: burst size and refill per minute)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "True").lower() in ("1", "true", "yes")
+    RATE_LIMIT_SIGNIN_IP_BURST: int = int(os.getenv("RATE_LIMIT_SIGNIN_IP_BURST", "20"))
+    RATE_LIMIT_SIGNIN_IP_PER_MINUTE: float = float(os.getenv("RATE_LIMIT_SIGNIN_IP_PER_MINUTE", "30"))
+    RATE_LIMIT_SIGNIN_EMAIL_BURST: int = int(os.getenv("RATE_LIMIT_SIGNIN_EMAIL_BURST", "5"))
+    RATE_LIMIT_SIGNIN_EMAIL_PER_MINUTE: float = float(os.getenv("RATE_LIMIT_SIGNIN_EMAIL_PER_MINUTE", "5"))
+    RATE_LIMIT_FORGOT_IP_BURST: int = int(os.getenv("RATE_LIMIT_FORGOT_IP_BURST", "5"))
+    RATE_LIMIT_FORGOT_IP_PER_MINUTE: float = float(os.getenv("RATE_LIMIT_FORGOT_IP_PER_MINUTE", "5"))
+    RATE_LIMIT_FORGOT_EMAIL_BURST: int = int(os.getenv("RATE_LIMIT_FORGOT_EMAIL_BURST", "3"))
+    RATE_LIMIT_FORGOT_EMAIL_PER_MINUTE: float = float(os.getenv("RATE_LIMIT_FORGOT_EMAIL_PER_MINUTE", "1"))
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    RATE_LIMIT_COMPACT_SECONDS: float = float(os.getenv("RATE_LIMIT_COMPACT_SECONDS", "60"))
+
+    # Password Hashing Configuration
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
     
     # Email Configuration
     SMTP_SERVER: str = os.getenv("SMTP_SERVER", "smtp.gmail.com")
     SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
     SMTP_USERNAME: str = os.getenv("SMTP_USERNAME", "")
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
+    SMTP_USE_TLS: bool = os.getenv("SMTP_USE_TLS", "True").lower() in ("1", "true", "yes")
+    SMTP_TIMEOUT: float = float(os.getenv("SMTP_TIMEOUT", "10"))
+    # Reconnect when the shared SMTP connection has been idle this long
+    SMTP_IDLE_SECONDS: float = float(os.getenv("SMTP_IDLE_SECONDS", "60"))
+
+    # Email Outbox Configuration
+    OUTBOX_POLL_SECONDS: float = float(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+    OUTBOX_LEASE_SECONDS: float = float(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    OUTBOX_BACKOFF_SECONDS: float = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "5"))
+    OUTBOX_MAX_BACKOFF_SECONDS: float = float(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", "900"))
+    OUTBOX_RETENTION_DAYS: int = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
     
     # Application Configuration
     APP_NAME: str = os.getenv("APP_NAME", "E-Commerce API")
-    DEBUG: bool = os.getenv("DEBUG", "False")
+    DEBUG: bool = os.getenv("DEBUG", "False").lower() in ("1", "true", "yes")
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
     
+    # Logging Configuration
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    LOG_DEBUG_SAMPLE_RATE: float = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+    
+    # Metrics Configuration
+    METRICS_WINDOW_SIZE: int = int(os.getenv("METRICS_WINDOW_SIZE", "1024"))
+    SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+    SLOW_QUERY_MAX_FINGERPRINTS: int = int(os.getenv("SLOW_QUERY_MAX_FINGERPRINTS", "500"))
+    
+    # Catalog Caching Configuration (entries are also dropped when the catalog changes)
+    PRODUCT_COUNT_CACHE_SIZE: int = int(os.getenv("PRODUCT_COUNT_CACHE_SIZE", "1000"))
+    PRODUCT_COUNT_CACHE_TTL_SECONDS: float = float(os.getenv("PRODUCT_COUNT_CACHE_TTL_SECONDS", "300"))
+    # Writes from other worker processes become visible to this one after at most the TTL
+    PRODUCT_CACHE_SIZE: int = int(os.getenv("PRODUCT_CACHE_SIZE", "10000"))
+    PRODUCT_CACHE_TTL_SECONDS: float = float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", "30"))
+    # Cache-Control max-age for the public product endpoints (revalidated with ETags)
+    HTTP_CACHE_MAX_AGE_SECONDS: int = int(os.getenv("HTTP_CACHE_MAX_AGE_SECONDS", "60"))
+    
+    # Bulk Import Configuration
+    BULK_SPOOL_MEMORY_BYTES: int = int(os.getenv("BULK_SPOOL_MEMORY_BYTES", str(4 * 1024 * 1024)))
+    BULK_MAX_UPLOAD_BYTES: int = int(os.getenv("BULK_MAX_UPLOAD_BYTES", str(512 * 1024 * 1024)))
+    BULK_IMPORT_CHUNK_SIZE: int = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "200"))
+    BULK_IMPORT_MAX_REPORTED_ISSUES: int = int(os.getenv("BULK_IMPORT_MAX_REPORTED_ISSUES", "1000"))
+    # Products per upsert transaction (no hashing, so chunks can be much larger than for users)
+    PRODUCT_IMPORT_CHUNK_SIZE: int = int(os.getenv("PRODUCT_IMPORT_CHUNK_SIZE", "2000"))
+    # Entries accepted by one inventory update request (applied in a single transaction)
+    INVENTORY_UPDATE_MAX_ITEMS: int = int(os.getenv("INVENTORY_UPDATE_MAX_ITEMS", "50000"))
+    # Rows fetched and encoded per step of a catalog export
+    PRODUCT_EXPORT_CHUNK_SIZE: int = int(os.getenv("PRODUCT_EXPORT_CHUNK_SIZE", "1000"))
+    
     # Payment Configuration
     DUMMY_PAYMENT_SUCCESS_RATE: float = float(os.getenv("DUMMY_PAYMENT_SUCCESS_RATE", "0.9"))
     
@@ -44,6 +133,3 @@ class Settings:
 
 # Create a global settings instance
 settings = Settings()
-
-# Validate settings on import
-settings.validate() 
\ No newline at end of file
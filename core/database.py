@@ -1,149 +1,383 @@
+import asyncio
+import contextvars
+import functools
+import queue
 import sqlite3
-from typing import Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, TypeVar
 from .config import settings
 from .logging import get_logger
+from .metrics import record_db_query, record_db_time, registry
+from .query_log import fingerprint, is_slow, log_slow_query, query_stats
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available in time"""
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times every statement.
+
+    Execute and fetch times feed the request metrics in core.metrics and the
+    per-fingerprint statistics and slow-query log in core.query_log.
+    """
+    _statement: Optional[tuple] = None
+    _statement_seconds = 0.0
+    _slow_logged = False
+
+    def _track(self, seconds: float, new_statement: bool) -> None:
+        if new_statement:
+            record_db_query(seconds)
+        else:
+            record_db_time(seconds)
+        if self._statement is None:
+            return
+        sql, parameters = self._statement
+        self._statement_seconds += seconds
+        query_stats.record(fingerprint(sql), seconds, self._statement_seconds, new_statement)
+        if not self._slow_logged and is_slow(self._statement_seconds):
+            self._slow_logged = True
+            log_slow_query(self.connection, sql, parameters, self._statement_seconds)
+
+    def _start(self, sql: str, parameters: Any) -> float:
+        self._statement = (sql, parameters)
+        self._statement_seconds = 0.0
+        self._slow_logged = False
+        return time.perf_counter()
+
+    def execute(self, sql, parameters=()):
+        started = self._start(sql, parameters)
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._track(time.perf_counter() - started, True)
+
+    def executemany(self, sql, seq_of_parameters):
+        # Parameters are not kept: the sequence may be a one-shot iterator
+        started = self._start(sql, None)
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._track(time.perf_counter() - started, True)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._track(time.perf_counter() - started, False)
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            self._track(time.perf_counter() - started, False)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._track(time.perf_counter() - started, False)
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors are instrumented"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def configure_connection(conn: sqlite3.Connection) -> None:
+    """Apply per-connection PRAGMAs"""
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute(f"PRAGMA busy_timeout = {int(settings.DB_BUSY_TIMEOUT_MS)}")
+    conn.execute(f"PRAGMA cache_size = -{int(settings.DB_CACHE_SIZE_KB)}")
+    conn.execute(f"PRAGMA mmap_size = {int(settings.DB_MMAP_SIZE)}")
+
+class ConnectionPool:
+    """Thread-safe pool of long-lived SQLite connections.
+
+    Up to ``pool_size`` idle connections are kept open between requests.
+    When all of them are checked out, up to ``max_overflow`` extra
+    connections are opened and closed again on release. Idle connections
+    are pinged before reuse once they have been idle longer than
+    ``health_check_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        database: str,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        timeout: float = 30.0,
+        health_check_interval: float = 30.0
+    ):
+        self.database = database
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size + max_overflow)
+        self._lock = threading.Lock()
+        self._checked_out = 0
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        logger.debug("Opening pooled database connection to: %s", self.database)
+        conn = sqlite3.connect(self.database, check_same_thread=False, factory=InstrumentedConnection)
+        configure_connection(conn)
+        return conn
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error as e:
+            logger.warning("Discarding unhealthy pooled connection: %s", e)
+            return False
+
+    def _take_idle(self) -> Optional[sqlite3.Connection]:
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            if time.monotonic() - last_used < self.health_check_interval or self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check a connection out of the pool"""
+        if self._closed:
+            raise PoolTimeoutError("Connection pool is closed")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeoutError(
+                f"No database connection available within {self.timeout} seconds"
+            )
+        try:
+            conn = self._take_idle() or self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._checked_out += 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool"""
+        keep = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            keep = False
+        with self._lock:
+            self._checked_out -= 1
+            keep = keep and not self._closed and self._idle.qsize() < self.pool_size
+        if keep:
+            self._idle.put((conn, time.monotonic()))
+        else:
+            self._discard(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for the duration of a ``with`` block.
+
+        Uncommitted work is rolled back when the block exits.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self) -> dict:
+        """Return current pool usage"""
+        with self._lock:
+            return {
+                "size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "checked_out": self._checked_out,
+                "idle": self._idle.qsize()
+            }
+
+    def close(self) -> None:
+        """Close all idle connections and refuse new checkouts"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+def init_pool() -> ConnectionPool:
+    """Create the global connection pool if it does not exist yet"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            logger.info(
+                "Creating database connection pool (size=%s, max_overflow=%s)",
+                settings.DB_POOL_SIZE, settings.DB_POOL_MAX_OVERFLOW
+            )
+            _pool = ConnectionPool(
+                settings.DATABASE_URL,
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+                timeout=settings.DB_POOL_TIMEOUT,
+                health_check_interval=settings.DB_POOL_HEALTH_CHECK_SECONDS
+            )
+        return _pool
+
+def _pool_usage():
+    pool = _pool
+    if pool is None:
+        return []
+    stats = pool.stats()
+    return [
+        (("checked_out",), stats["checked_out"]),
+        (("idle",), stats["idle"]),
+        (("limit",), stats["size"] + stats["max_overflow"])
+    ]
+
+registry.gauge("db_pool_connections", "Database pool connections by state", ("state",), callback=_pool_usage)
+
+def get_pool() -> ConnectionPool:
+    """Return the global connection pool, creating it on first use"""
+    return _pool or init_pool()
+
+def close_pool() -> None:
+    """Close the global connection pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            logger.info("Closing database connection pool...")
+            _pool.close()
+            _pool = None
+
+@contextmanager
+def database_connection() -> Iterator[sqlite3.Connection]:
+    """Borrow a pooled database connection"""
+    with get_pool().connection() as conn:
+        yield conn
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def init_executor() -> ThreadPoolExecutor:
+    """Create the bounded executor that runs blocking database calls"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            logger.info("Creating database executor with %s workers", settings.DB_EXECUTOR_WORKERS)
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.DB_EXECUTOR_WORKERS,
+                thread_name_prefix="db"
+            )
+        return _executor
+
+def shutdown_executor() -> None:
+    """Wait for queued database calls and stop the executor"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            logger.info("Shutting down database executor...")
+            _executor.shutdown(wait=True)
+            _executor = None
+
+async def run_in_db_executor(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking database function without blocking the event loop.
+
+    The caller's context variables are carried over to the worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await loop.run_in_executor(_executor or init_executor(), call)
+
+def awaitable(func: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """Build an awaitable version of a blocking data access function"""
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run_in_db_executor(func, *args, **kwargs)
+    return wrapper
+
+async def iterate_in_db_executor(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """Consume a blocking iterator from the database executor, one item per call.
+
+    Lets a streaming response read query results that hold a pooled
+    connection between items. If the consumer stops early, for example on a
+    client disconnect, the iterator is closed so its connection goes back to
+    the pool.
+    """
+    lock = threading.Lock()
+    done = object()
+
+    def step():
+        with lock:
+            return next(iterator, done)
+
+    def close():
+        with lock:
+            close_iterator = getattr(iterator, "close", None)
+            if close_iterator is not None:
+                close_iterator()
+
+    try:
+        while True:
+            item = await run_in_db_executor(step)
+            if item is done:
+                return
+            yield item
+    finally:
+        # Not awaited: a disconnected client's task is already cancelled. The
+        # lock holds the close back until a step still running has finished.
+        (_executor or init_executor()).submit(close)
+
 def get_database_connection():
-    """Get database connection"""
-    logger.debug(f"Creating database connection to: {settings.DATABASE_URL}")
-    return sqlite3.connect(settings.DATABASE_URL)
+    """Get a standalone (unpooled) database connection"""
+    logger.debug("Creating database connection to: %s", settings.DATABASE_URL)
+    conn = sqlite3.connect(settings.DATABASE_URL, factory=InstrumentedConnection)
+    configure_connection(conn)
+    return conn
 
 def init_database():
-    """Initialize all database tables"""
+    """Initialize the database by applying pending schema migrations"""
+    from .migrations import migrate, schema_is_current
+
     logger.debug("Starting database initialization...")
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    
-    logger.debug("Creating users table...")
-    # Users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            role TEXT NOT NULL DEFAULT 'user',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    logger.debug("Creating reset_tokens table...")
-    # Reset tokens table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS reset_tokens (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT NOT NULL,
-            token TEXT NOT NULL,
-            expires_at TIMESTAMP NOT NULL,
-            used BOOLEAN DEFAULT FALSE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    logger.debug("Creating products table...")
-    # Products table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS products (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            description TEXT NOT NULL,
-            price REAL NOT NULL,
-            stock INTEGER NOT NULL DEFAULT 0,
-            category TEXT NOT NULL,
-            image_url TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    logger.debug("Creating products update trigger...")
-    # Create trigger to update products timestamp
-    cursor.execute('''
-        CREATE TRIGGER IF NOT EXISTS update_products_timestamp 
-        AFTER UPDATE ON products
-        FOR EACH ROW
-        BEGIN
-            UPDATE products SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
-        END
-    ''')
-    
-    logger.debug("Creating cart table...")
-    # Cart table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS cart (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            product_id INTEGER NOT NULL,
-            quantity INTEGER NOT NULL DEFAULT 1,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
-            FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE CASCADE,
-            UNIQUE(user_id, product_id)
-        )
-    ''')
-    
-    logger.debug("Creating cart update trigger...")
-    # Create trigger to update cart timestamp
-    cursor.execute('''
-        CREATE TRIGGER IF NOT EXISTS update_cart_timestamp 
-        AFTER UPDATE ON cart
-        FOR EACH ROW
-        BEGIN
-            UPDATE cart SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
-        END
-    ''')
-    
-    logger.debug("Creating orders table...")
-    # Orders table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS orders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            total_amount REAL NOT NULL,
-            shipping_address TEXT NOT NULL,
-            payment_method TEXT NOT NULL,
-            order_status TEXT NOT NULL DEFAULT 'pending',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-        )
-    ''')
-    
-    logger.debug("Creating orders update trigger...")
-    # Create trigger to update orders timestamp
-    cursor.execute('''
-        CREATE TRIGGER IF NOT EXISTS update_orders_timestamp 
-        AFTER UPDATE ON orders
-        FOR EACH ROW
-        BEGIN
-            UPDATE orders SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
-        END
-    ''')
-    
-    logger.debug("Creating order_items table...")
-    # Order items table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS order_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            order_id INTEGER NOT NULL,
-            product_id INTEGER NOT NULL,
-            product_name TEXT NOT NULL,
-            product_price REAL NOT NULL,
-            quantity INTEGER NOT NULL,
-            subtotal REAL NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (order_id) REFERENCES orders (id) ON DELETE CASCADE,
-            FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE CASCADE
-        )
-    ''')
-    
-    logger.debug("Committing database changes...")
-    conn.commit()
-    logger.debug("Closing database connection...")
-    conn.close()
+    with database_connection() as conn:
+        if schema_is_current(conn):
+            logger.debug("Database schema is current, skipping migrations")
+            return
+        applied = migrate(conn)
+    if applied:
+        logger.info("Applied schema migrations: %s", applied)
     logger.debug("Database initialization completed successfully")
 
 def close_database_connection(conn: sqlite3.Connection):
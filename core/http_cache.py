@@ -0,0 +1,74 @@
+"""HTTP helpers: conditional GET (validators, Cache-Control, 304) and content coding negotiation."""
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Optional
+from fastapi import Request, Response, status
+from core.config import settings
+
+def http_date(timestamp: Optional[str]) -> Optional[str]:
+    """Format a SQLite CURRENT_TIMESTAMP value (UTC) as an HTTP date"""
+    if not timestamp:
+        return None
+    try:
+        parsed = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+    return format_datetime(parsed.replace(tzinfo=timezone.utc), usegmt=True)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compare an If-None-Match header with an ETag (weak comparison, as for GET)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+def accepts_encoding(accept_encoding: Optional[str], coding: str) -> bool:
+    """Return True when an Accept-Encoding header allows ``coding``.
+
+    The coding (or its ``x-`` alias) must be listed with a q-value above
+    zero, or be covered by ``*`` when it is not listed at all.
+    """
+    if not accept_encoding:
+        return False
+    names = {coding.lower(), f"x-{coding.lower()}"}
+    listed = wildcard = None
+    for element in accept_encoding.split(","):
+        name, _, parameters = element.partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        for parameter in parameters.split(";"):
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name in names:
+            listed = max(listed or 0.0, quality)
+        elif name == "*":
+            wildcard = quality
+    if listed is not None:
+        return listed > 0
+    return wildcard is not None and wildcard > 0
+
+def conditional_response(request: Request, response: Response, etag: str,
+                         last_modified: Optional[str] = None) -> Optional[Response]:
+    """Attach validators and Cache-Control to ``response``.
+
+    Returns a bodiless 304 carrying the same headers when the client's
+    If-None-Match already names this version; the caller should return it
+    instead of building the body.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.HTTP_CACHE_MAX_AGE_SECONDS}",
+    }
+    modified = http_date(last_modified)
+    if modified:
+        headers["Last-Modified"] = modified
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
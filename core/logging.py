@@ -1,12 +1,54 @@
+import copy
 import logging
-import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
 from core.config import settings
 
+_listener: Optional[QueueListener] = None
+
+class DebugSamplingFilter(logging.Filter):
+    """Keep only a fraction of DEBUG records; other levels always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+class ListenerFormattingQueueHandler(QueueHandler):
+    """Enqueue records without running the formatter in the calling thread.
+
+    The stock ``prepare`` formats the whole record before enqueueing it.
+    Here only the message is merged with its arguments, which also
+    snapshots mutable arguments. The listener's handlers then render
+    timestamps and tracebacks on their own thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
 def setup_logging():
-    """Initialize logging with console and file handlers"""
-    log_level = "DEBUG" if settings.DEBUG else os.getenv("LOG_LEVEL", "INFO").upper()
+    """Initialize logging with console and file handlers.
+
+    Request threads only merge each message with its arguments and enqueue
+    the record. A background QueueListener thread applies the formatter
+    and does the console and file I/O.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_level = "DEBUG" if settings.DEBUG else settings.LOG_LEVEL
     valid_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
     log_level = log_level if log_level in valid_levels else "INFO"
 
@@ -14,26 +56,59 @@ def setup_logging():
     logs_dir = Path("logs")
     logs_dir.mkdir(exist_ok=True)
 
-    # Log file with timestamp
+    # Log file with timestamp, rotated by size
     log_filename = logs_dir / f"app_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
 
     log_format = "%(asctime)s - %(levelname)s - %(name)s - %(funcName)s:%(lineno)d - %(message)s"
     date_format = "%Y-%m-%d %H:%M:%S"
+    formatter = logging.Formatter(log_format, datefmt=date_format)
+
+    console_handler = logging.StreamHandler()
+    file_handler = RotatingFileHandler(
+        log_filename,
+        maxBytes=settings.LOG_MAX_BYTES,
+        backupCount=settings.LOG_BACKUP_COUNT,
+        encoding="utf-8"
+    )
+    # Slow statements also go to their own file for offline analysis
+    slow_query_handler = RotatingFileHandler(
+        logs_dir / "slow_queries.log",
+        maxBytes=settings.LOG_MAX_BYTES,
+        backupCount=settings.LOG_BACKUP_COUNT,
+        encoding="utf-8"
+    )
+    slow_query_handler.addFilter(logging.Filter("slow_queries"))
+    for handler in (console_handler, file_handler, slow_query_handler):
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    queue_handler = ListenerFormattingQueueHandler(log_queue)
+    queue_handler.addFilter(DebugSamplingFilter(settings.LOG_DEBUG_SAMPLE_RATE))
 
     # Configure root logger
-    logging.basicConfig(
-        level=log_level,
-        format=log_format,
-        datefmt=date_format,
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler(log_filename, mode="w", encoding="utf-8")
-        ]
+    root = logging.getLogger()
+    root.setLevel(log_level)
+    root.handlers[:] = [queue_handler]
+
+    _listener = QueueListener(
+        log_queue, console_handler, file_handler, slow_query_handler, respect_handler_level=True
     )
+    _listener.start()
 
     logger = logging.getLogger(__name__)
-    logger.info(f"Logging initialized at level: {log_level}")
-    logger.info(f"Logs written to: {log_filename}")
+    logger.info("Logging initialized at level: %s", log_level)
+    logger.info("Logs written to: %s", log_filename)
+    if settings.LOG_DEBUG_SAMPLE_RATE < 1.0:
+        logger.info("Sampling DEBUG records at rate: %s", settings.LOG_DEBUG_SAMPLE_RATE)
+
+def shutdown_logging():
+    """Flush queued records and stop the background listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
 
 def get_logger(name: str) -> logging.Logger:
     """Return a logger with the given name"""
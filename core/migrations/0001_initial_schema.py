@@ -0,0 +1,142 @@
+"""Initial schema: users, reset tokens, products, cart and orders.
+
+Uses ``IF NOT EXISTS`` so databases created before migrations were
+introduced are adopted as version 1 without changes.
+"""
+import sqlite3
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+def up(cursor: sqlite3.Cursor):
+    """Create all tables and timestamp triggers"""
+    logger.debug("Creating users table...")
+    # Users table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL DEFAULT 'user',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    logger.debug("Creating reset_tokens table...")
+    # Reset tokens table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reset_tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT NOT NULL,
+            token TEXT NOT NULL,
+            expires_at TIMESTAMP NOT NULL,
+            used BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    logger.debug("Creating products table...")
+    # Products table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            price REAL NOT NULL,
+            stock INTEGER NOT NULL DEFAULT 0,
+            category TEXT NOT NULL,
+            image_url TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    logger.debug("Creating products update trigger...")
+    # Create trigger to update products timestamp
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS update_products_timestamp 
+        AFTER UPDATE ON products
+        FOR EACH ROW
+        BEGIN
+            UPDATE products SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+        END
+    ''')
+    
+    logger.debug("Creating cart table...")
+    # Cart table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cart (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+            FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE CASCADE,
+            UNIQUE(user_id, product_id)
+        )
+    ''')
+    
+    logger.debug("Creating cart update trigger...")
+    # Create trigger to update cart timestamp
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS update_cart_timestamp 
+        AFTER UPDATE ON cart
+        FOR EACH ROW
+        BEGIN
+            UPDATE cart SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+        END
+    ''')
+    
+    logger.debug("Creating orders table...")
+    # Orders table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            total_amount REAL NOT NULL,
+            shipping_address TEXT NOT NULL,
+            payment_method TEXT NOT NULL,
+            order_status TEXT NOT NULL DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+    ''')
+    
+    logger.debug("Creating orders update trigger...")
+    # Create trigger to update orders timestamp
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS update_orders_timestamp 
+        AFTER UPDATE ON orders
+        FOR EACH ROW
+        BEGIN
+            UPDATE orders SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+        END
+    ''')
+    
+    logger.debug("Creating order_items table...")
+    # Order items table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            product_name TEXT NOT NULL,
+            product_price REAL NOT NULL,
+            quantity INTEGER NOT NULL,
+            subtotal REAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (order_id) REFERENCES orders (id) ON DELETE CASCADE,
+            FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE CASCADE
+        )
+    ''')
+
+def down(cursor: sqlite3.Cursor):
+    """Drop all tables and triggers"""
+    for trigger in ("update_orders_timestamp", "update_cart_timestamp", "update_products_timestamp"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    for table in ("order_items", "orders", "cart", "products", "reset_tokens", "users"):
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
@@ -0,0 +1,27 @@
+"""Secondary indexes for the hot lookup and listing queries."""
+import sqlite3
+
+INDEXES = [
+    # get_user_orders: WHERE user_id = ? ORDER BY created_at DESC
+    ("idx_orders_user_created", "orders", "user_id, created_at"),
+    # get_order_items: WHERE order_id = ?
+    ("idx_order_items_order", "order_items", "order_id"),
+    # get_cart_items: WHERE c.user_id = ? ORDER BY c.created_at DESC
+    ("idx_cart_user_created", "cart", "user_id, created_at"),
+    # get_products_filtered: category filter with price range / price sort
+    ("idx_products_category_price", "products", "category, price"),
+    # get_products / get_products_filtered: ORDER BY created_at DESC
+    ("idx_products_created_at", "products", "created_at"),
+    # validate_reset_token: WHERE token = ?
+    ("idx_reset_tokens_token", "reset_tokens", "token"),
+]
+
+def up(cursor: sqlite3.Cursor):
+    """Create the secondary indexes"""
+    for name, table, columns in INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+def down(cursor: sqlite3.Cursor):
+    """Drop the secondary indexes"""
+    for name, _, _ in INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,28 @@
+"""Refresh token families for rotation and reuse detection.
+
+Every refresh token gets a row keyed by its ``jti``. Rotating a token marks
+its row used and issues a successor in the same family. Presenting a token
+that was already used or revoked revokes the whole family.
+"""
+import sqlite3
+
+def up(cursor: sqlite3.Cursor):
+    """Create the refresh_tokens table"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS refresh_tokens (
+            jti TEXT PRIMARY KEY,
+            family_id TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            expires_at TIMESTAMP NOT NULL,
+            used_at TIMESTAMP,
+            revoked BOOLEAN NOT NULL DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_refresh_tokens_family ON refresh_tokens (family_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user ON refresh_tokens (user_id)")
+
+def down(cursor: sqlite3.Cursor):
+    """Drop the refresh_tokens table"""
+    cursor.execute("DROP TABLE IF EXISTS refresh_tokens")
@@ -0,0 +1,26 @@
+"""Revoked access tokens and per-user session revocations.
+
+``key`` is either a token ``jti`` (logout) or ``user:<email>`` (revoke all
+sessions of a user issued before ``revoked_at``). Times are Unix epoch
+seconds so they compare directly with the JWT ``iat``/``exp`` claims. The
+autoincrement ``id`` lets each worker load new rows incrementally.
+"""
+import sqlite3
+
+def up(cursor: sqlite3.Cursor):
+    """Create the revoked_tokens table"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS revoked_tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT UNIQUE NOT NULL,
+            revoked_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires ON revoked_tokens (expires_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_refresh_tokens_expires ON refresh_tokens (expires_at)")
+
+def down(cursor: sqlite3.Cursor):
+    """Drop the revoked_tokens table"""
+    cursor.execute("DROP INDEX IF EXISTS idx_refresh_tokens_expires")
+    cursor.execute("DROP TABLE IF EXISTS revoked_tokens")
@@ -0,0 +1,33 @@
+"""Transactional email outbox.
+
+Messages are inserted in the same transaction as the change that causes
+them and delivered later by the outbox worker. ``next_attempt_at`` (Unix
+epoch seconds) doubles as the delivery lease, so several workers can drain
+the table without sending a message twice.
+"""
+import sqlite3
+
+def up(cursor: sqlite3.Cursor):
+    """Create the email_outbox table"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recipient TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'sent', 'failed')),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            sent_at TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_email_outbox_pending
+        ON email_outbox (next_attempt_at) WHERE status = 'pending'
+    ''')
+
+def down(cursor: sqlite3.Cursor):
+    """Drop the email_outbox table"""
+    cursor.execute("DROP TABLE IF EXISTS email_outbox")
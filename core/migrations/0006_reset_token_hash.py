@@ -0,0 +1,52 @@
+"""Store password reset tokens as SHA-256 digests.
+
+Rebuilds ``reset_tokens`` with a unique ``token_hash`` column in place of
+the plaintext ``token`` and adds an ``expires_at`` index for the expiry
+sweeper. Existing tokens are hashed during the copy so outstanding reset
+emails keep working.
+
+Downgrading cannot recover plaintext tokens: the digests are copied into
+``token`` and tokens issued before the downgrade stop validating.
+"""
+import hashlib
+import sqlite3
+
+def _create_table(cursor: sqlite3.Cursor, name: str, token_column: str):
+    cursor.execute(f'''
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT NOT NULL,
+            {token_column},
+            expires_at TIMESTAMP NOT NULL,
+            used BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def up(cursor: sqlite3.Cursor):
+    """Replace the plaintext token column with an indexed digest"""
+    _create_table(cursor, "reset_tokens_new", "token_hash TEXT UNIQUE NOT NULL")
+    cursor.execute('SELECT id, email, token, expires_at, used, created_at FROM reset_tokens')
+    rows = [
+        (row_id, email, hashlib.sha256(token.encode()).hexdigest(), expires_at, used, created_at)
+        for row_id, email, token, expires_at, used, created_at in cursor.fetchall()
+    ]
+    cursor.executemany(
+        '''INSERT OR IGNORE INTO reset_tokens_new (id, email, token_hash, expires_at, used, created_at)
+           VALUES (?, ?, ?, ?, ?, ?)''',
+        rows
+    )
+    cursor.execute("DROP TABLE reset_tokens")
+    cursor.execute("ALTER TABLE reset_tokens_new RENAME TO reset_tokens")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reset_tokens_expires ON reset_tokens (expires_at)")
+
+def down(cursor: sqlite3.Cursor):
+    """Restore the plaintext token column (existing tokens become invalid)"""
+    _create_table(cursor, "reset_tokens_old", "token TEXT NOT NULL")
+    cursor.execute('''
+        INSERT INTO reset_tokens_old (id, email, token, expires_at, used, created_at)
+        SELECT id, email, token_hash, expires_at, used, created_at FROM reset_tokens
+    ''')
+    cursor.execute("DROP TABLE reset_tokens")
+    cursor.execute("ALTER TABLE reset_tokens_old RENAME TO reset_tokens")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reset_tokens_token ON reset_tokens (token)")
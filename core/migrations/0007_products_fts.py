@@ -0,0 +1,57 @@
+"""Full-text search index over product name, description and category.
+
+``products_fts`` is an external-content FTS5 table: it stores only the
+index and reads column values from ``products``. Triggers keep it in sync;
+the update trigger only fires when an indexed column changes, so stock and
+price updates never touch the index. Ranking uses BM25 with name matches
+weighted highest, then category, then description.
+"""
+import sqlite3
+
+TRIGGERS = [
+    ("products_fts_insert", '''
+        CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products
+        BEGIN
+            INSERT INTO products_fts (rowid, name, description, category)
+            VALUES (NEW.id, NEW.name, NEW.description, NEW.category);
+        END
+    '''),
+    ("products_fts_delete", '''
+        CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products
+        BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description, category)
+            VALUES ('delete', OLD.id, OLD.name, OLD.description, OLD.category);
+        END
+    '''),
+    ("products_fts_update", '''
+        CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, description, category ON products
+        BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description, category)
+            VALUES ('delete', OLD.id, OLD.name, OLD.description, OLD.category);
+            INSERT INTO products_fts (rowid, name, description, category)
+            VALUES (NEW.id, NEW.name, NEW.description, NEW.category);
+        END
+    '''),
+]
+
+def up(cursor: sqlite3.Cursor):
+    """Create and populate the FTS5 index and its sync triggers"""
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            name, description, category,
+            content='products', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    ''')
+    # Column weights for ORDER BY rank: name, description, category
+    cursor.execute("INSERT INTO products_fts (products_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 4.0)')")
+    for _, sql in TRIGGERS:
+        cursor.execute(sql)
+    cursor.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+
+def down(cursor: sqlite3.Cursor):
+    """Drop the FTS5 index and its triggers"""
+    for name, _ in TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    cursor.execute("DROP TABLE IF EXISTS products_fts")
@@ -0,0 +1,28 @@
+"""Indexes backing keyset pagination of the product listings.
+
+Every listing orders by ``(sort key, id)``. SQLite appends the rowid to each
+index entry, so an index on the sort column serves both the ORDER BY and
+the ``(key, id) > (?, ?)`` seek without a sort step.
+"""
+import sqlite3
+
+INDEXES = [
+    # get_products_filtered: ORDER BY name, id
+    ("idx_products_name", "products", "name"),
+    # get_products_filtered: ORDER BY price, id
+    ("idx_products_price", "products", "price"),
+    # get_products_filtered: category filter with the created_at / name sorts
+    # (price is covered by idx_products_category_price)
+    ("idx_products_category_created_at", "products", "category, created_at"),
+    ("idx_products_category_name", "products", "category, name"),
+]
+
+def up(cursor: sqlite3.Cursor):
+    """Create the keyset pagination indexes"""
+    for name, table, columns in INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+def down(cursor: sqlite3.Cursor):
+    """Drop the keyset pagination indexes"""
+    for name, _, _ in INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,41 @@
+"""Catalog generation counter for cache invalidation.
+
+``catalog_state`` holds a single row whose ``generation`` is bumped by
+triggers on every product insert, delete and content update. Caches of
+derived catalog data (listing counts) store the generation they were
+computed at and are stale as soon as it moves, across every worker process
+sharing the database.
+"""
+import sqlite3
+
+TRIGGERS = [
+    ("catalog_generation_insert", "AFTER INSERT ON products"),
+    ("catalog_generation_delete", "AFTER DELETE ON products"),
+    # Not on updated_at, so the timestamp trigger does not bump it a second time
+    ("catalog_generation_update",
+     "AFTER UPDATE OF name, description, price, stock, category, image_url ON products"),
+]
+
+def up(cursor: sqlite3.Cursor):
+    """Create the catalog state row and the triggers that bump it"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO catalog_state (id, generation) VALUES (1, 0)")
+    for name, event in TRIGGERS:
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {name} {event}
+            BEGIN
+                UPDATE catalog_state SET generation = generation + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+            END
+        ''')
+
+def down(cursor: sqlite3.Cursor):
+    """Drop the catalog state table and its triggers"""
+    for name, _ in TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    cursor.execute("DROP TABLE IF EXISTS catalog_state")
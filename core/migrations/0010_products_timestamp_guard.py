@@ -0,0 +1,27 @@
+"""Let product writers set updated_at themselves.
+
+``update_products_timestamp`` ran a second UPDATE for every updated product
+row. It now only fires when the statement left ``updated_at`` untouched, so
+bulk writers that set ``updated_at = CURRENT_TIMESTAMP`` in their own
+statement update each row once.
+"""
+import sqlite3
+
+def _create_trigger(cursor: sqlite3.Cursor, when: str) -> None:
+    cursor.execute("DROP TRIGGER IF EXISTS update_products_timestamp")
+    cursor.execute(f'''
+        CREATE TRIGGER update_products_timestamp
+        AFTER UPDATE ON products
+        FOR EACH ROW {when}
+        BEGIN
+            UPDATE products SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+        END
+    ''')
+
+def up(cursor: sqlite3.Cursor):
+    """Skip the timestamp trigger when the statement set updated_at"""
+    _create_trigger(cursor, "WHEN NEW.updated_at IS OLD.updated_at")
+
+def down(cursor: sqlite3.Cursor):
+    """Restore the unconditional timestamp trigger"""
+    _create_trigger(cursor, "")
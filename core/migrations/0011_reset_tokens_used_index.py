@@ -0,0 +1,16 @@
+"""Partial index over consumed reset tokens.
+
+``sweep_reset_tokens`` deletes used tokens separately from expired ones so
+that each batch can seek an index: ``idx_reset_tokens_expires`` covers the
+expiry half and this index, holding only rows with ``used = 1``, covers
+the other.
+"""
+import sqlite3
+
+def up(cursor: sqlite3.Cursor):
+    """Index the used reset tokens"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reset_tokens_used ON reset_tokens (id) WHERE used = 1")
+
+def down(cursor: sqlite3.Cursor):
+    """Drop the used reset token index"""
+    cursor.execute("DROP INDEX IF EXISTS idx_reset_tokens_used")
@@ -0,0 +1,136 @@
+"""Versioned schema migrations.
+
+Each migration is a module in this package named ``NNNN_description.py``
+that defines ``up(cursor)`` and ``down(cursor)``. Migrations are applied in
+version order, each inside its own transaction, and every applied version
+is recorded in the ``schema_version`` table.
+"""
+import importlib
+import re
+import sqlite3
+from pathlib import Path
+from types import ModuleType
+from typing import List, NamedTuple, Optional, Tuple
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+class MigrationError(Exception):
+    """Raised when a migration cannot be applied or rolled back"""
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    module_name: str
+
+    def load(self) -> ModuleType:
+        """Import the migration module"""
+        return importlib.import_module(f"{__name__}.{self.module_name}")
+
+def discover_migrations() -> List[Migration]:
+    """Return all migrations in this package ordered by version"""
+    migrations = []
+    for path in Path(__file__).parent.iterdir():
+        match = MIGRATION_FILE_PATTERN.match(path.name)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), path.stem))
+    migrations.sort()
+
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise MigrationError(f"Duplicate migration versions: {versions}")
+    return migrations
+
+def latest_version() -> int:
+    """Return the highest available migration version"""
+    migrations = discover_migrations()
+    return migrations[-1].version if migrations else 0
+
+def ensure_version_table(conn: sqlite3.Connection) -> None:
+    """Create the schema_version table if needed"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+def get_current_version(conn: sqlite3.Connection) -> int:
+    """Return the highest applied migration version (0 for a fresh database)"""
+    ensure_version_table(conn)
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+def schema_is_current(conn: sqlite3.Connection) -> bool:
+    """Return True when no migration is pending.
+
+    Issues a single read and no DDL, so booting workers against an
+    up-to-date database stays cheap.
+    """
+    try:
+        current = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0]
+    except sqlite3.OperationalError:
+        return False
+    return current == latest_version()
+
+def get_status(conn: sqlite3.Connection) -> List[Tuple[int, str, Optional[str]]]:
+    """Return (version, name, applied_at) for every known migration"""
+    ensure_version_table(conn)
+    applied = dict(conn.execute("SELECT version, applied_at FROM schema_version").fetchall())
+    return [(m.version, m.name, applied.get(m.version)) for m in discover_migrations()]
+
+def _is_applied(cursor: sqlite3.Cursor, version: int) -> bool:
+    cursor.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,))
+    return cursor.fetchone() is not None
+
+def _run(conn: sqlite3.Connection, migration: Migration, direction: str) -> None:
+    module = migration.load()
+    cursor = conn.cursor()
+    try:
+        # Take the write lock first so concurrently booting workers apply
+        # each migration exactly once
+        cursor.execute("BEGIN IMMEDIATE")
+        if _is_applied(cursor, migration.version) == (direction == "up"):
+            conn.rollback()
+            return
+        getattr(module, direction)(cursor)
+        if direction == "up":
+            cursor.execute(
+                "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                (migration.version, migration.name)
+            )
+        else:
+            cursor.execute("DELETE FROM schema_version WHERE version = ?", (migration.version,))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise MigrationError(
+            f"Migration {migration.version:04d}_{migration.name} ({direction}) failed: {e}"
+        ) from e
+
+def migrate(conn: sqlite3.Connection, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to ``target`` (default: latest)"""
+    current = get_current_version(conn)
+    pending = [
+        m for m in discover_migrations()
+        if m.version > current and (target is None or m.version <= target)
+    ]
+    for migration in pending:
+        logger.info("Applying migration %04d_%s", migration.version, migration.name)
+        _run(conn, migration, "up")
+    return [m.version for m in pending]
+
+def rollback(conn: sqlite3.Connection, target: int) -> List[int]:
+    """Roll back applied migrations newer than ``target``"""
+    current = get_current_version(conn)
+    applied = [
+        m for m in reversed(discover_migrations())
+        if target < m.version <= current
+    ]
+    for migration in applied:
+        logger.info("Rolling back migration %04d_%s", migration.version, migration.name)
+        _run(conn, migration, "down")
+    return [m.version for m in applied]
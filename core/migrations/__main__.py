@@ -0,0 +1,43 @@
+"""Command line interface for schema migrations.
+
+Usage:
+    python -m core.migrations status
+    python -m core.migrations upgrade [--target VERSION]
+    python -m core.migrations downgrade --target VERSION
+"""
+import argparse
+import sys
+from core.database import get_database_connection, close_database_connection
+from . import MigrationError, get_status, migrate, rollback
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.migrations", description="Manage schema migrations")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="Show applied and pending migrations")
+    upgrade = subparsers.add_parser("upgrade", help="Apply pending migrations")
+    upgrade.add_argument("--target", type=int, default=None, help="Stop at this version")
+    downgrade = subparsers.add_parser("downgrade", help="Roll back migrations")
+    downgrade.add_argument("--target", type=int, required=True, help="Version to roll back to")
+    args = parser.parse_args(argv)
+
+    conn = get_database_connection()
+    try:
+        if args.command == "upgrade":
+            applied = migrate(conn, target=args.target)
+            print(f"Applied: {', '.join(map(str, applied))}" if applied else "Already up to date")
+        elif args.command == "downgrade":
+            reverted = rollback(conn, target=args.target)
+            print(f"Rolled back: {', '.join(map(str, reverted))}" if reverted else "Nothing to roll back")
+
+        for version, name, applied_at in get_status(conn):
+            state = f"applied {applied_at}" if applied_at else "pending"
+            print(f"{version:04d}  {name:<40} {state}")
+    except MigrationError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        close_database_connection(conn)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""Email outbox: transactional enqueue and batched background delivery.
+
+Request handlers call ``enqueue_email`` with the cursor of the transaction
+that causes the message, so the email exists exactly when the change it
+describes was committed. A periodic job claims due messages in batches and
+delivers them over one authenticated SMTP connection that is kept open
+between batches. A message the server rejects is charged an attempt and
+retried with exponential backoff until OUTBOX_MAX_ATTEMPTS, then marked
+``failed``; the connection stays open for the rest of the batch. When the
+server cannot be reached at all, the untried messages are put back without
+charging an attempt.
+"""
+import random
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from core.background import register_periodic
+from core.config import settings
+from core.database import database_connection
+from core.logging import get_logger
+from core.metrics import registry
+
+logger = get_logger(__name__)
+
+outbox_emails_total = registry.counter(
+    "outbox_emails_total", "Outbox delivery attempts by result", ("result",)
+)
+
+def enqueue_email(cursor: sqlite3.Cursor, recipient: str, subject: str, body: str) -> None:
+    """Queue an email as part of the caller's transaction"""
+    cursor.execute(
+        'INSERT INTO email_outbox (recipient, subject, body, next_attempt_at) VALUES (?, ?, ?, ?)',
+        (recipient, subject, body, time.time())
+    )
+
+class SMTPUnavailable(Exception):
+    """The SMTP server could not be reached; says nothing about the message"""
+
+class SMTPSender:
+    """A lazily opened SMTP connection reused across messages and batches.
+
+    Only the outbox thread uses it, so it needs no locking.
+    """
+
+    def __init__(self):
+        self._server = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        # Deferred: only the outbox worker needs SMTP and MIME support
+        import smtplib
+
+        logger.debug("Connecting to SMTP server %s:%s", settings.SMTP_SERVER, settings.SMTP_PORT)
+        server = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT)
+        if settings.SMTP_USE_TLS:
+            server.starttls()
+        if settings.SMTP_USERNAME:
+            server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+        return server
+
+    @property
+    def connected(self) -> bool:
+        return self._server is not None
+
+    def close(self) -> None:
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                self._server.close()
+            self._server = None
+
+    def send(self, recipient: str, subject: str, body: str) -> None:
+        import smtplib
+        from email.mime.text import MIMEText
+
+        msg = MIMEText(body, 'plain')
+        msg['From'] = settings.SMTP_USERNAME
+        msg['To'] = recipient
+        msg['Subject'] = subject
+
+        if self._server is not None and time.monotonic() - self._last_used > settings.SMTP_IDLE_SECONDS:
+            # Servers drop idle sessions; start fresh rather than fail the first send
+            self.close()
+        for attempt in range(2):
+            if self._server is None:
+                try:
+                    self._server = self._connect()
+                except (smtplib.SMTPException, OSError) as e:
+                    raise SMTPUnavailable(str(e)) from e
+            try:
+                self._server.sendmail(settings.SMTP_USERNAME, recipient, msg.as_string())
+                self._last_used = time.monotonic()
+                return
+            except smtplib.SMTPServerDisconnected as e:
+                self._server = None
+                if attempt:
+                    raise SMTPUnavailable(str(e)) from e
+            except smtplib.SMTPException:
+                # Refused recipient, rejected data: this message only. smtplib
+                # has reset the session, so the connection stays in use
+                self._last_used = time.monotonic()
+                raise
+            except OSError as e:
+                # Socket errors (SMTPException is an OSError too, handled above)
+                self.close()
+                raise SMTPUnavailable(str(e)) from e
+
+_sender = SMTPSender()
+# One thread: SMTP I/O never occupies a database executor thread
+_outbox_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+
+def _backoff(attempts: int) -> float:
+    delay = min(settings.OUTBOX_BACKOFF_SECONDS * (2 ** (attempts - 1)), settings.OUTBOX_MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+def _claim_batch() -> list:
+    """Lease due messages to this worker by pushing their next attempt forward"""
+    now = time.time()
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            '''UPDATE email_outbox SET next_attempt_at = ?
+               WHERE id IN (
+                   SELECT id FROM email_outbox
+                   WHERE status = 'pending' AND next_attempt_at <= ?
+                   ORDER BY next_attempt_at LIMIT ?
+               )
+               RETURNING id, recipient, subject, body, attempts''',
+            (now + settings.OUTBOX_LEASE_SECONDS, now, settings.OUTBOX_BATCH_SIZE)
+        )
+        batch = cursor.fetchall()
+        conn.commit()
+    return batch
+
+def deliver_pending_emails() -> int:
+    """Send one batch of due messages; return how many were delivered"""
+    batch = _claim_batch()
+    if not batch:
+        return 0
+
+    sent = []
+    failures = []
+    for index, (message_id, recipient, subject, body, attempts) in enumerate(batch):
+        try:
+            _sender.send(recipient, subject, body)
+            sent.append((message_id,))
+            outbox_emails_total.inc("sent")
+        except SMTPUnavailable as e:
+            # Put this and the remaining messages back without charging an
+            # attempt to messages the server never got to judge
+            remaining = batch[index:]
+            logger.warning("SMTP server unavailable, deferring %s emails: %s", len(remaining), e)
+            retry_at = time.time() + _backoff(1)
+            failures.extend(('pending', row[4], retry_at, str(e), row[0]) for row in remaining)
+            outbox_emails_total.inc("deferred", amount=len(remaining))
+            break
+        except Exception as e:
+            attempts += 1
+            if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                logger.error("Giving up on email %s to %s after %s attempts: %s", message_id, recipient, attempts, e)
+                failures.append(('failed', attempts, time.time(), str(e), message_id))
+                outbox_emails_total.inc("failed")
+            else:
+                logger.warning("Email %s to %s failed (attempt %s): %s", message_id, recipient, attempts, e)
+                failures.append(('pending', attempts, time.time() + _backoff(attempts), str(e), message_id))
+                outbox_emails_total.inc("retry")
+
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "UPDATE email_outbox SET status = 'sent', sent_at = CURRENT_TIMESTAMP WHERE id = ?",
+            sent
+        )
+        cursor.executemany(
+            'UPDATE email_outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?',
+            failures
+        )
+        conn.commit()
+    logger.info("Outbox batch: %s sent, %s failed", len(sent), len(failures))
+    return len(sent)
+
+def prune_sent_emails() -> None:
+    """Delete delivered messages older than the retention period"""
+    cutoff = datetime.utcnow() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM email_outbox WHERE status = 'sent' AND sent_at < ?", (cutoff,))
+        conn.commit()
+
+def close_outbox_connection() -> None:
+    """Close the shared SMTP connection from the outbox thread"""
+    _outbox_executor.submit(_sender.close).result()
+
+register_periodic("email-outbox", settings.OUTBOX_POLL_SECONDS, deliver_pending_emails, _outbox_executor)
+register_periodic("email-outbox-prune", 3600, prune_sent_emails)
@@ -0,0 +1,120 @@
+"""Per-statement timing aggregated by SQL fingerprint, plus a slow-query log.
+
+Statements are normalized into fingerprints (literals replaced by ``?``,
+``IN`` lists collapsed, whitespace squeezed) so dynamically built SQL
+groups by shape. Any statement slower than ``SLOW_QUERY_THRESHOLD_MS`` is
+written to the ``slow_queries`` logger together with its parameters and
+``EXPLAIN QUERY PLAN`` output.
+"""
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from core.config import settings
+from core.logging import get_logger
+
+slow_query_logger = get_logger("slow_queries")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """Normalize a SQL statement so queries of the same shape group together"""
+    normalized = _STRING_LITERAL.sub("?", sql)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+class QueryStats:
+    """Thread-safe call count and timing totals per fingerprint"""
+
+    def __init__(self, max_fingerprints: int):
+        self.max_fingerprints = max_fingerprints
+        self._stats: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key: str) -> dict:
+        entry = self._stats.get(key)
+        if entry is None:
+            if len(self._stats) >= self.max_fingerprints:
+                # Make room by forgetting the cheapest fingerprint
+                cheapest = min(self._stats, key=lambda k: self._stats[k]["total"])
+                del self._stats[cheapest]
+            entry = self._stats[key] = {
+                "calls": 0, "total": 0.0, "max": 0.0, "slow_calls": 0, "last_plan": None
+            }
+        return entry
+
+    def record(self, key: str, seconds: float, statement_seconds: float, new_call: bool) -> None:
+        """Add execute or fetch time to a fingerprint.
+
+        ``statement_seconds`` is the time the current statement has taken
+        so far and is used to track the slowest single call.
+        """
+        with self._lock:
+            entry = self._entry(key)
+            if new_call:
+                entry["calls"] += 1
+            entry["total"] += seconds
+            if statement_seconds > entry["max"]:
+                entry["max"] = statement_seconds
+
+    def record_slow(self, key: str, plan: Optional[List[str]]) -> None:
+        with self._lock:
+            entry = self._entry(key)
+            entry["slow_calls"] += 1
+            if plan is not None:
+                entry["last_plan"] = plan
+
+    def top(self, limit: int = 20) -> List[dict]:
+        """Return the fingerprints with the highest total time"""
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda item: item[1]["total"], reverse=True)[:limit]
+            return [
+                {
+                    "fingerprint": key,
+                    "calls": entry["calls"],
+                    "total_ms": round(entry["total"] * 1000, 3),
+                    "avg_ms": round(entry["total"] * 1000 / entry["calls"], 3) if entry["calls"] else 0.0,
+                    "max_ms": round(entry["max"] * 1000, 3),
+                    "slow_calls": entry["slow_calls"],
+                    "last_plan": entry["last_plan"]
+                }
+                for key, entry in items
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+query_stats = QueryStats(settings.SLOW_QUERY_MAX_FINGERPRINTS)
+
+def explain(conn: sqlite3.Connection, sql: str, parameters: Any) -> Optional[List[str]]:
+    """Return the EXPLAIN QUERY PLAN lines for a statement, if it has a plan"""
+    if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+        return None
+    try:
+        # Bypass the instrumented cursor so the EXPLAIN is not timed itself
+        rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+    except sqlite3.Error as e:
+        return [f"unavailable: {e}"]
+    return [row[3] for row in rows]
+
+def log_slow_query(conn: sqlite3.Connection, sql: str, parameters: Any, seconds: float) -> None:
+    """Record a statement that crossed the slow-query threshold"""
+    key = fingerprint(sql)
+    plan = explain(conn, sql, parameters) if parameters is not None else None
+    query_stats.record_slow(key, plan)
+    slow_query_logger.warning(
+        "Slow query (%.1f ms): %s | params=%r | plan=%s",
+        seconds * 1000, key, parameters, " / ".join(plan) if plan else "n/a"
+    )
+
+def is_slow(seconds: float) -> bool:
+    """Return True when a statement duration crosses the slow-query threshold"""
+    return seconds * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS
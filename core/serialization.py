@@ -0,0 +1,27 @@
+"""Fast JSON responses for endpoints that return database rows.
+
+Building a Pydantic model per row and then letting FastAPI validate and
+serialize the response model again dominates CPU time on large pages.
+Rows read from our own schema already carry the right types, so listing
+endpoints map them to dicts with ``rows_as_dicts`` and return them through
+``json_response``. FastAPI sends a returned Response as is, so the route's
+``response_model`` then only documents the schema.
+"""
+from typing import Any, Iterable, List, Optional, Sequence
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+def rows_as_dicts(rows: Iterable[Sequence], fields: Sequence[str]) -> List[dict]:
+    """Map row tuples to dicts by position; extra trailing columns are dropped"""
+    return [dict(zip(fields, row)) for row in rows]
+
+def json_response(content: Any, response: Optional[Response] = None) -> ORJSONResponse:
+    """Encode trusted content with orjson, skipping response model validation.
+
+    Headers set on the route's injected ``response`` (ETags, cache headers)
+    are carried over, as FastAPI only merges them into responses it builds.
+    """
+    result = ORJSONResponse(content)
+    if response is not None:
+        result.raw_headers.extend(response.raw_headers)
+    return result
@@ -1,33 +1,60 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from auth.passwords import init_password_pool, shutdown_password_pool
+from auth.revocation import revocations
 from auth.routes import router as auth_router
 from products.routes import router as products_router
 from products.public_routes import router as public_products_router
 from cart.routes import router as cart_router
 from checkout.routes import router as checkout_router
 from orders.routes import router as orders_router
-from core.database import init_database
+from monitoring.routes import router as monitoring_router
+from core.background import start_periodic_jobs, stop_periodic_jobs
+from core.outbox import close_outbox_connection
+from core.database import init_database, init_pool, close_pool, init_executor, shutdown_executor
 from core.config import settings
-from core.logging import get_logger, setup_logging
-
-setup_logging()
+from core.logging import get_logger, setup_logging, shutdown_logging
+from core.metrics import MetricsMiddleware
 
 # Initialize logger
 logger = get_logger(__name__)
 
-# Debug logging test
-logger.debug(f"Application starting with DEBUG={settings.DEBUG}")
-logger.debug(f"Database URL: {settings.DATABASE_URL}")
-logger.debug(f"App Name: {settings.APP_NAME}")
-logger.debug(f"Host: {settings.HOST}, Port: {settings.PORT}")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize the application on startup and release resources on shutdown"""
+    setup_logging()
+    settings.validate()
+
+    logger.debug("Application starting with DEBUG=%s", settings.DEBUG)
+    logger.debug("Database URL: %s", settings.DATABASE_URL)
+    logger.debug("App Name: %s", settings.APP_NAME)
+    logger.debug("Host: %s, Port: %s", settings.HOST, settings.PORT)
+
+    logger.info("Opening database connection pool...")
+    init_pool()
+    init_executor()
+    init_password_pool()
 
-app = FastAPI(title=settings.APP_NAME)
+    # Migrations only run when the stored schema version is behind
+    logger.info("Initializing database...")
+    init_database()
+    logger.info("Database initialized successfully")
 
-# Initialize database
-logger.info("Initializing database...")
-logger.debug("About to call init_database()")
-init_database()
-logger.debug("Database initialization completed")
-logger.info("Database initialized successfully")
+    revocations.rebuild()
+    start_periodic_jobs()
+
+    logger.info("Application '%s' started successfully", settings.APP_NAME)
+    yield
+    await stop_periodic_jobs()
+    close_outbox_connection()
+    shutdown_password_pool()
+    shutdown_executor()
+    close_pool()
+    logger.info("Database connection pool closed")
+    shutdown_logging()
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 # Include routers with debug logging
 logger.debug("Including authentication router...")
@@ -48,11 +75,14 @@ app.include_router(checkout_router, prefix="/checkout", tags=["checkout"])
 logger.debug("Including orders router...")
 app.include_router(orders_router, prefix="/orders", tags=["orders"])
 
-logger.info(f"Application '{settings.APP_NAME}' started successfully")
+logger.debug("Including monitoring router...")
+app.include_router(monitoring_router, tags=["monitoring"])
+
 logger.debug("All routers included successfully")
 
 if __name__ == "__main__":
     import uvicorn
-    logger.info(f"Starting server on {settings.HOST}:{settings.PORT}")
+    setup_logging()
+    logger.info("Starting server on %s:%s", settings.HOST, settings.PORT)
     logger.debug("About to start uvicorn server")
     uvicorn.run(app, host=settings.HOST, port=settings.PORT)
\ No newline at end of file
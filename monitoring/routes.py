@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.responses import PlainTextResponse
+from auth.utils import verify_admin
+from core.metrics import registry
+from core.query_log import query_stats
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Expose application metrics in the Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/admin/slow-queries")
+async def slow_queries(
+    limit: int = Query(20, ge=1, le=500, description="Number of fingerprints to return"),
+    admin_user: dict = Depends(verify_admin)
+):
+    """List SQL fingerprints by total time spent (Admin only)"""
+    return {"queries": query_stats.top(limit)}
+
+@router.delete("/admin/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_slow_queries(admin_user: dict = Depends(verify_admin)):
+    """Reset the per-fingerprint query statistics (Admin only)"""
+    query_stats.reset()
+    logger.info("Query statistics reset by admin: %s", admin_user["email"])
@@ -2,7 +2,8 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from pydantic import BaseModel
 from typing import List
 from auth.utils import get_current_user
-from .utils import get_user_orders, get_order_by_id, get_order_items
+from core.serialization import json_response
+from .utils import get_user_orders_async, get_order_by_id_async, get_order_items_async
 
 router = APIRouter()
 
@@ -32,25 +33,25 @@ class OrderHistoryResponse(BaseModel):
 @router.get("", response_model=List[OrderHistoryResponse])
 async def get_orders(current_user: dict = Depends(get_current_user)):
     """Get order history for the current user"""
-    orders = get_user_orders(current_user["id"])
-    return [
-        OrderHistoryResponse(
-            order_id=o[0],
-            created_at=o[6],
-            total_amount=o[2],
-            order_status=o[5]
-        ) for o in orders
-    ]
+    orders = await get_user_orders_async(current_user["id"])
+    return json_response([
+        {
+            "order_id": o[0],
+            "created_at": o[6],
+            "total_amount": o[2],
+            "order_status": o[5]
+        } for o in orders
+    ])
 
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order_detail(order_id: int, current_user: dict = Depends(get_current_user)):
     """Get order details for the current user"""
-    order = get_order_by_id(order_id)
+    order = await get_order_by_id_async(order_id)
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
     if order[1] != current_user["id"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your order")
-    items = get_order_items(order_id)
+    items = await get_order_items_async(order_id)
     return OrderResponse(
         order_id=order[0],
         user_id=order[1],
@@ -0,0 +1,220 @@
+"""Bulk product import from CSV or NDJSON.
+
+Records need ``name``, ``description``, ``price``, ``stock`` and
+``category`` and may set ``image_url``. A record with an ``id`` upserts
+that product; records without one create new products. Rows are processed
+in chunks of PRODUCT_IMPORT_CHUNK_SIZE:
+
+1. validate each row
+2. upsert the chunk with one ``executemany`` in its own transaction; rows
+   identical to the stored product are skipped, so re-importing a feed only
+   writes (and re-indexes) what changed
+
+Bad rows are reported per line and never abort the import. That includes
+rows SQLite itself refuses: the chunk is then retried row by row.
+
+The full-text index normally follows every row through its triggers. With
+``defer_index`` (``--defer-index`` on the CLI) the whole load instead runs
+in one transaction that drops the triggers, upserts every chunk, recreates
+them and rebuilds the index. Other writers wait for the load rather than
+miss the index, and an interrupted load leaves the schema untouched.
+
+Usage: python -m products.bulk_import catalog.csv [--format csv|ndjson] [--defer-index]
+"""
+import argparse
+import json
+import sqlite3
+import sys
+from typing import IO, List, Optional, Tuple
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from core.bulk_io import ImportReport, RecordError, chunked, detect_format, iter_records, open_text
+from core.config import settings
+from core.database import database_connection, awaitable
+from core.logging import get_logger
+from .utils import SQLITE_MAX_INTEGER, invalidate_product_cache
+
+logger = get_logger(__name__)
+
+UPSERT_SQL = '''
+    INSERT INTO products (id, name, description, price, stock, category, image_url)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        name = excluded.name,
+        description = excluded.description,
+        price = excluded.price,
+        stock = excluded.stock,
+        category = excluded.category,
+        image_url = excluded.image_url,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE (name, description, price, stock, category, image_url)
+        IS NOT (excluded.name, excluded.description, excluded.price, excluded.stock,
+                excluded.category, excluded.image_url)
+'''
+
+class ProductImportRow(BaseModel):
+    id: Optional[int] = Field(None, gt=0, le=SQLITE_MAX_INTEGER)
+    name: str = Field(min_length=1)
+    description: str
+    price: float = Field(ge=0, allow_inf_nan=False)
+    stock: int = Field(ge=0, le=SQLITE_MAX_INTEGER)
+    category: str = Field(min_length=1)
+    image_url: Optional[str] = None
+
+    @field_validator("id", "image_url", mode="before")
+    @classmethod
+    def empty_as_none(cls, value):
+        # CSV has no null: an empty cell means "not set"
+        return None if value == "" else value
+
+    def values(self) -> tuple:
+        return (self.id, self.name, self.description, self.price, self.stock, self.category, self.image_url)
+
+def _existing_ids(cursor: sqlite3.Cursor, ids: List[int]) -> set:
+    existing = set()
+    for batch in chunked(ids, 500):
+        cursor.execute(f'SELECT id FROM products WHERE id IN ({", ".join("?" * len(batch))})', batch)
+        existing.update(row[0] for row in cursor.fetchall())
+    return existing
+
+def _upsert_rows_one_by_one(cursor: sqlite3.Cursor, rows: list, report: ImportReport) -> Tuple[list, int]:
+    """Upsert rows separately so a row SQLite rejects is reported on its own line"""
+    accepted = []
+    written = 0
+    for line, row in rows:
+        try:
+            cursor.execute(UPSERT_SQL, row.values())
+        except (sqlite3.Error, OverflowError) as e:
+            report.issue(line, "error", f"Rejected by the database: {e}", id=row.id)
+            continue
+        accepted.append((line, row))
+        written += cursor.rowcount
+    return accepted, written
+
+def _import_chunk(cursor: sqlite3.Cursor, chunk: list, report: ImportReport) -> int:
+    """Validate and upsert one chunk in the caller's transaction; return how many rows were written"""
+    rows = []
+    for line, record in chunk:
+        report.rows += 1
+        if isinstance(record, RecordError):
+            report.issue(line, "error", str(record), id=None)
+            continue
+        try:
+            rows.append((line, ProductImportRow(**record)))
+        except ValidationError as e:
+            error = e.errors()[0]
+            report.issue(line, "error", f"{'.'.join(map(str, error['loc']))}: {error['msg']}", id=record.get("id") or None)
+    if not rows:
+        return 0
+
+    existing = _existing_ids(cursor, [row.id for _, row in rows if row.id is not None])
+    # A row SQLite refuses to bind or store aborts executemany part way; the
+    # savepoint undoes the rows before it and the chunk is retried row by row
+    cursor.execute('SAVEPOINT import_chunk')
+    try:
+        cursor.executemany(UPSERT_SQL, [row.values() for _, row in rows])
+        # Inserted and actually changed rows; identical rows are not counted
+        accepted, written = rows, cursor.rowcount
+    except (sqlite3.Error, OverflowError) as e:
+        logger.debug("Chunk rejected by the database (%s), retrying row by row", e)
+        cursor.execute('ROLLBACK TO import_chunk')
+        accepted, written = _upsert_rows_one_by_one(cursor, rows, report)
+    cursor.execute('RELEASE import_chunk')
+
+    inserted = 0
+    for _, row in accepted:
+        if row.id is None or row.id not in existing:
+            inserted += 1
+            if row.id is not None:
+                existing.add(row.id)
+    report.add("inserted", inserted)
+    report.add("updated", written - inserted)
+    report.add("unchanged", len(accepted) - written)
+    return written
+
+def _suspend_search_triggers(cursor: sqlite3.Cursor) -> list:
+    """Drop the full-text index triggers in the current transaction and return their SQL"""
+    cursor.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'products' "
+        "AND name LIKE 'products_fts%'"
+    )
+    triggers = cursor.fetchall()
+    for name, _ in triggers:
+        cursor.execute(f"DROP TRIGGER {name}")
+    return [sql for _, sql in triggers]
+
+def _restore_search_triggers(cursor: sqlite3.Cursor, triggers: list) -> None:
+    for sql in triggers:
+        cursor.execute(sql)
+    cursor.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+
+def import_products(text: IO[str], fmt: str, defer_index: bool = False) -> dict:
+    """Import products from a text stream and return the import report"""
+    logger.info("Starting bulk product import (%s%s)", fmt, ", deferred index" if defer_index else "")
+    report = ImportReport("inserted", "updated", "unchanged")
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        if defer_index:
+            # One transaction for the whole load: nobody else ever sees the
+            # triggers missing, and an interrupted import rolls them back too
+            cursor.execute('BEGIN IMMEDIATE')
+            triggers = _suspend_search_triggers(cursor)
+        written = 0
+        for chunk in chunked(iter_records(text, fmt), settings.PRODUCT_IMPORT_CHUNK_SIZE):
+            if defer_index:
+                written += _import_chunk(cursor, chunk, report)
+            else:
+                cursor.execute('BEGIN IMMEDIATE')
+                chunk_written = _import_chunk(cursor, chunk, report)
+                conn.commit()
+                if chunk_written:
+                    invalidate_product_cache()
+            logger.debug("Product import progress: %s rows", report.rows)
+        if defer_index:
+            _restore_search_triggers(cursor, triggers)
+            conn.commit()
+            if written:
+                invalidate_product_cache()
+    result = report.as_dict()
+    logger.info(
+        "Bulk product import finished: %s rows, %s inserted, %s updated, %s unchanged, %s errors, %s rows/s",
+        result["rows"], result["inserted"], result["updated"], result["unchanged"], result["errors"],
+        result["rows_per_second"]
+    )
+    return result
+
+def import_products_from_file(binary: IO[bytes], fmt: str, defer_index: bool = False) -> dict:
+    """Import products from a binary file object (an upload spool or an opened file)"""
+    with open_text(binary) as text:
+        return import_products(text, fmt, defer_index)
+
+import_products_from_file_async = awaitable(import_products_from_file)
+
+def main(argv=None) -> int:
+    from core.database import init_database
+    from core.logging import setup_logging, shutdown_logging
+
+    parser = argparse.ArgumentParser(prog="python -m products.bulk_import", description="Bulk import products")
+    parser.add_argument("path", help="CSV or NDJSON file, '-' for stdin")
+    parser.add_argument("--format", choices=("csv", "ndjson"), default=None, help="Input format (default: from file name)")
+    parser.add_argument(
+        "--defer-index", action="store_true",
+        help="Load in one transaction and rebuild the search index once instead of updating it per row"
+    )
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    init_database()
+    fmt = detect_format(args.format, args.path)
+    try:
+        if args.path == "-":
+            report = import_products_from_file(sys.stdin.buffer, fmt, args.defer_index)
+        else:
+            with open(args.path, "rb") as binary:
+                report = import_products_from_file(binary, fmt, args.defer_index)
+    finally:
+        shutdown_logging()
+    print(json.dumps(report, indent=2))
+    return 0 if report["errors"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
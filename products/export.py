@@ -0,0 +1,102 @@
+"""Streaming full-catalog export as NDJSON or CSV.
+
+Products are read in id order from a single read transaction, so the feed
+is a consistent snapshot even while writes land. Rows are fetched
+PRODUCT_EXPORT_CHUNK_SIZE at a time, and each chunk is encoded and
+optionally gzip-compressed before the next one is read. Memory therefore
+stays flat whatever the catalog size. While an export runs it holds one
+pooled connection, and it keeps the WAL from being checkpointed past its
+snapshot.
+
+Usage: python -m products.export [catalog.ndjson] [--format csv|ndjson] [--gzip]
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import zlib
+from typing import Iterator
+from core.bulk_io import detect_format
+from core.config import settings
+from core.database import database_connection
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+EXPORT_COLUMNS = ("id", "name", "description", "price", "stock", "category", "image_url", "created_at", "updated_at")
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+GZIP_LEVEL = 6
+
+def _encode_ndjson(rows: list) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False, separators=(",", ":")) + "\n"
+        for row in rows
+    ).encode("utf-8")
+
+def _encode_csv(rows: list) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+def iter_product_export(fmt: str, compress: bool = False) -> Iterator[bytes]:
+    """Yield the encoded catalog in chunks (a gzip stream when ``compress`` is set)"""
+    encode = _encode_csv if fmt == "csv" else _encode_ndjson
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    gzip = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+    exported = 0
+
+    def output(data: bytes) -> bytes:
+        return gzip.compress(data) if gzip else data
+
+    if fmt == "csv":
+        yield output(_encode_csv([EXPORT_COLUMNS]))
+
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        # One read transaction: every chunk comes from the same snapshot
+        cursor.execute('BEGIN')
+        cursor.execute(f'SELECT {", ".join(EXPORT_COLUMNS)} FROM products ORDER BY id')
+        while True:
+            rows = cursor.fetchmany(settings.PRODUCT_EXPORT_CHUNK_SIZE)
+            if not rows:
+                break
+            exported += len(rows)
+            data = output(encode(rows))
+            # The compressor buffers small chunks internally
+            if data:
+                yield data
+        conn.commit()
+
+    if gzip:
+        yield gzip.flush()
+    logger.info("Exported %s products (%s%s)", exported, fmt, ", gzip" if compress else "")
+
+def main(argv=None) -> int:
+    from core.database import init_database
+    from core.logging import setup_logging, shutdown_logging
+
+    parser = argparse.ArgumentParser(prog="python -m products.export", description="Export the product catalog")
+    parser.add_argument("path", nargs="?", default="-", help="Output file, '-' for stdout (default)")
+    parser.add_argument("--format", choices=("csv", "ndjson"), default=None, help="Output format (default: from file name)")
+    parser.add_argument("--gzip", action="store_true", help="Compress the output with gzip")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    init_database()
+    fmt = detect_format(args.format, args.path if args.path != "-" else "ndjson")
+    try:
+        if args.path == "-":
+            sys.stdout.buffer.writelines(iter_product_export(fmt, args.gzip))
+            sys.stdout.buffer.flush()
+        else:
+            with open(args.path, "wb") as binary:
+                binary.writelines(iter_product_export(fmt, args.gzip))
+    finally:
+        shutdown_logging()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,30 @@
-from fastapi import APIRouter, HTTPException, status, Query
+import hashlib
+from fastapi import APIRouter, HTTPException, Request, Response, status, Query
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from core.http_cache import conditional_response
+from core.serialization import json_response, rows_as_dicts
 from .utils import (
-    get_products_filtered,
-    search_products,
-    get_product_by_id,
-    get_total_products_count_filtered
+    decode_cursor,
+    encode_cursor,
+    get_catalog_version_async,
+    get_products_filtered_async,
+    search_products_async,
+    get_product_by_id_async,
+    get_total_products_count_filtered_async
 )
 
 router = APIRouter()
 
+def catalog_etag(generation: int) -> str:
+    """ETag for listings: any product write bumps the catalog generation"""
+    return f'"catalog-{generation}"'
+
+def product_etag(product: Tuple) -> str:
+    """ETag for one product, from its row (updated_at alone only has second resolution)"""
+    digest = hashlib.sha1(repr(product).encode("utf-8")).hexdigest()[:16]
+    return f'"product-{product[0]}-{digest}"'
+
 # Pydantic models
 class PublicProductResponse(BaseModel):
     id: int
@@ -22,21 +37,34 @@ class PublicProductResponse(BaseModel):
 
 class PublicProductListResponse(BaseModel):
     products: List[PublicProductResponse]
-    total: int
-    page: int
+    total: Optional[int]
+    page: Optional[int]
     page_size: int
-    total_pages: int
+    total_pages: Optional[int]
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+PUBLIC_PRODUCT_FIELDS = tuple(PublicProductResponse.model_fields)
 
 @router.get("", response_model=PublicProductListResponse)
 async def get_products_public(
+    request: Request,
+    response: Response,
     category: Optional[str] = Query(None, description="Filter by category"),
     min_price: Optional[float] = Query(None, ge=0, description="Minimum price filter"),
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price filter"),
     sort_by: Optional[str] = Query("created_at", description="Sort by: name, price, created_at"),
     page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(10, ge=1, le=100, description="Items per page")
+    page_size: int = Query(10, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces page"),
+    include_total: bool = Query(True, description="Count all matches; false returns only has_more")
 ):
-    """Get list of products with filters and pagination (Public access)"""
+    """Get list of products with filters and pagination (Public access)
+
+    Every response carries ``next_cursor`` while more products follow. Passing
+    it back continues right after the last product with an index seek, so
+    deep pages cost the same as the first one.
+    """
     try:
         # Validate price range
         if min_price is not None and max_price is not None and min_price > max_price:
@@ -53,47 +81,61 @@ async def get_products_public(
                 detail=f"Invalid sort_by field. Must be one of: {', '.join(valid_sort_fields)}"
             )
         
+        after = None
+        if cursor is not None:
+            try:
+                after = decode_cursor(cursor, sort_by)
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e)
+                )
+        
+        # Read the version before the data, so an ETag never claims a newer
+        # catalog than the body; a matching If-None-Match skips the queries
+        generation, last_modified = await get_catalog_version_async()
+        not_modified = conditional_response(request, response, catalog_etag(generation), last_modified)
+        if not_modified:
+            return not_modified
+        
         # Calculate offset
         offset = (page - 1) * page_size
         
-        # Get filtered products
-        products = get_products_filtered(
+        # Get filtered products, one extra to tell whether another page follows
+        products = await get_products_filtered_async(
             category=category,
             min_price=min_price,
             max_price=max_price,
             sort_by=sort_by,
-            limit=page_size,
-            offset=offset
+            limit=page_size + 1,
+            offset=offset,
+            after=after
         )
+        next_cursor = None
+        if len(products) > page_size:
+            products = products[:page_size]
+            next_cursor = encode_cursor(sort_by, products[-1])
         
         # Get total count with same filters
-        total_count = get_total_products_count_filtered(
-            category=category,
-            min_price=min_price,
-            max_price=max_price
-        )
-        
-        total_pages = (total_count + page_size - 1) // page_size
-        
-        product_responses = []
-        for product in products:
-            product_responses.append(PublicProductResponse(
-                id=product[0],
-                name=product[1],
-                description=product[2],
-                price=product[3],
-                stock=product[4],
-                category=product[5],
-                image_url=product[6]
-            ))
+        total_count = total_pages = None
+        if include_total:
+            total_count = await get_total_products_count_filtered_async(
+                category=category,
+                min_price=min_price,
+                max_price=max_price,
+                generation=generation
+            )
+            total_pages = (total_count + page_size - 1) // page_size
         
-        return PublicProductListResponse(
-            products=product_responses,
-            total=total_count,
-            page=page,
-            page_size=page_size,
-            total_pages=total_pages
-        )
+        return json_response({
+            "products": rows_as_dicts(products, PUBLIC_PRODUCT_FIELDS),
+            "total": total_count,
+            "page": page if cursor is None else None,
+            "page_size": page_size,
+            "total_pages": total_pages,
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor
+        }, response)
     except HTTPException:
         raise
     except Exception as e:
@@ -104,45 +146,47 @@ async def get_products_public(
 
 @router.get("/search", response_model=PublicProductListResponse)
 async def search_products_public(
+    request: Request,
+    response: Response,
     keyword: str = Query(..., min_length=1, description="Search keyword"),
     page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(10, ge=1, le=100, description="Items per page")
+    page_size: int = Query(10, ge=1, le=100, description="Items per page"),
+    include_total: bool = Query(True, description="Count all matches; false returns only has_more")
 ):
     """Search products by keyword (Public access)"""
     try:
+        generation, last_modified = await get_catalog_version_async()
+        not_modified = conditional_response(request, response, catalog_etag(generation), last_modified)
+        if not_modified:
+            return not_modified
+        
         # Calculate offset
         offset = (page - 1) * page_size
         
-        # Search products
-        products = search_products(
+        # Search products, one extra to tell whether another page follows
+        products = await search_products_async(
             keyword=keyword,
-            limit=page_size,
+            limit=page_size + 1,
             offset=offset
         )
+        has_more = len(products) > page_size
+        products = products[:page_size]
         
         # Get total count for search
-        total_count = get_total_products_count_filtered(search_keyword=keyword)
-        total_pages = (total_count + page_size - 1) // page_size
-        
-        product_responses = []
-        for product in products:
-            product_responses.append(PublicProductResponse(
-                id=product[0],
-                name=product[1],
-                description=product[2],
-                price=product[3],
-                stock=product[4],
-                category=product[5],
-                image_url=product[6]
-            ))
+        total_count = total_pages = None
+        if include_total:
+            total_count = await get_total_products_count_filtered_async(search_keyword=keyword, generation=generation)
+            total_pages = (total_count + page_size - 1) // page_size
         
-        return PublicProductListResponse(
-            products=product_responses,
-            total=total_count,
-            page=page,
-            page_size=page_size,
-            total_pages=total_pages
-        )
+        return json_response({
+            "products": rows_as_dicts(products, PUBLIC_PRODUCT_FIELDS),
+            "total": total_count,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": total_pages,
+            "has_more": has_more,
+            "next_cursor": None
+        }, response)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -150,15 +194,20 @@ async def search_products_public(
         )
 
 @router.get("/{product_id}", response_model=PublicProductResponse)
-async def get_product_public(product_id: int):
+async def get_product_public(product_id: int, request: Request, response: Response):
     """Get product details by ID (Public access)"""
-    product = get_product_by_id(product_id)
+    product = await get_product_by_id_async(product_id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     
+    # The ETag hashes the row, so even a 304 needs it (usually from the product cache)
+    not_modified = conditional_response(request, response, product_etag(product), product[8])
+    if not_modified:
+        return not_modified
+    
     return PublicProductResponse(
         id=product[0],
         name=product[1],
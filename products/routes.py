@@ -1,17 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi import APIRouter, HTTPException, Depends, Request, status, Query
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer
 from pydantic import BaseModel, HttpUrl
 from typing import Optional, List
 from decimal import Decimal
 from .utils import (
-    create_product,
-    get_products,
-    get_product_by_id,
-    update_product,
-    delete_product,
-    get_total_products_count
+    decode_cursor,
+    encode_cursor,
+    create_product_async,
+    get_products_async,
+    get_product_by_id_async,
+    update_product_async,
+    delete_product_async,
+    apply_inventory_updates_async,
+    get_total_products_count_async
 )
-from auth.utils import get_current_user
+from auth.utils import get_current_user, verify_admin
+from core.bulk_io import detect_format, spool_request_body
+from core.config import settings
+from core.database import iterate_in_db_executor
+from core.http_cache import accepts_encoding
+from core.serialization import json_response, rows_as_dicts
+from .bulk_import import import_products_from_file_async
+from .export import MEDIA_TYPES, iter_product_export
 
 router = APIRouter()
 
@@ -43,22 +54,24 @@ class ProductResponse(BaseModel):
     created_at: str
     updated_at: str
 
+class InventoryUpdate(BaseModel):
+    id: int
+    stock: Optional[int] = None
+    stock_delta: Optional[int] = None
+    price: Optional[float] = None
+
+class InventoryUpdateRequest(BaseModel):
+    updates: List[InventoryUpdate]
+
 class ProductListResponse(BaseModel):
     products: List[ProductResponse]
     total: int
-    page: int
+    page: Optional[int]
     per_page: int
     total_pages: int
+    next_cursor: Optional[str] = None
 
-# Dependency to verify admin role
-async def verify_admin(current_user: dict = Depends(get_current_user)):
-    if current_user.get("role") != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Admin access required"
-        )
-    
-    return current_user
+PRODUCT_FIELDS = tuple(ProductResponse.model_fields)
 
 @router.post("/products", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product_endpoint(
@@ -67,7 +80,7 @@ async def create_product_endpoint(
 ):
     """Create a new product (Admin only)"""
     try:
-        product_id = create_product(
+        product_id = await create_product_async(
             name=product.name,
             description=product.description,
             price=product.price,
@@ -77,7 +90,7 @@ async def create_product_endpoint(
         )
         
         # Get the created product
-        created_product = get_product_by_id(product_id)
+        created_product = await get_product_by_id_async(product_id)
         return ProductResponse(
             id=created_product[0],
             name=created_product[1],
@@ -95,43 +108,88 @@ async def create_product_endpoint(
             detail=str(e)
         )
 
+@router.post("/products/import")
+async def import_products_endpoint(
+    http_request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson (default: from Content-Type)"),
+    admin_user: dict = Depends(verify_admin)
+):
+    """Create or update products from a CSV or NDJSON request body (Admin only)"""
+    try:
+        fmt = detect_format(format, http_request.headers.get("content-type"))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    upload = await spool_request_body(http_request)
+    try:
+        return await import_products_from_file_async(upload, fmt)
+    finally:
+        upload.close()
+
+@router.get("/products/export")
+async def export_products_endpoint(
+    http_request: Request,
+    format: str = Query("ndjson", pattern="^(csv|ndjson)$", description="csv or ndjson"),
+    admin_user: dict = Depends(verify_admin)
+):
+    """Stream the whole catalog as NDJSON or CSV, gzip-compressed if the client accepts it (Admin only)"""
+    compress = accepts_encoding(http_request.headers.get("accept-encoding"), "gzip")
+    headers = {
+        "Content-Disposition": f'attachment; filename="products.{format}"',
+        "Vary": "Accept-Encoding"
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        iterate_in_db_executor(iter_product_export(format, compress)),
+        media_type=MEDIA_TYPES[format],
+        headers=headers
+    )
+
+@router.post("/products/inventory")
+async def update_inventory_endpoint(
+    request: InventoryUpdateRequest,
+    admin_user: dict = Depends(verify_admin)
+):
+    """Set or adjust stock and prices for many products in one transaction (Admin only)"""
+    if len(request.updates) > settings.INVENTORY_UPDATE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.INVENTORY_UPDATE_MAX_ITEMS} updates per request"
+        )
+    return await apply_inventory_updates_async([update.model_dump() for update in request.updates])
+
 @router.get("/products", response_model=ProductListResponse)
 async def get_products_endpoint(
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces page"),
     admin_user: dict = Depends(verify_admin)
 ):
     """Get list of products with pagination (Admin only)"""
     try:
+        after = decode_cursor(cursor, "created_at") if cursor is not None else None
+        
         # Calculate offset
         offset = (page - 1) * per_page
         
-        # Get products
-        products = get_products(limit=per_page, offset=offset)
-        total_count = get_total_products_count()
+        # Get products, one extra to tell whether another page follows
+        products = await get_products_async(limit=per_page + 1, offset=offset, after=after)
+        next_cursor = None
+        if len(products) > per_page:
+            products = products[:per_page]
+            next_cursor = encode_cursor("created_at", products[-1])
+        total_count = await get_total_products_count_async()
         total_pages = (total_count + per_page - 1) // per_page
         
-        product_responses = []
-        for product in products:
-            product_responses.append(ProductResponse(
-                id=product[0],
-                name=product[1],
-                description=product[2],
-                price=product[3],
-                stock=product[4],
-                category=product[5],
-                image_url=product[6],
-                created_at=product[7],
-                updated_at=product[8]
-            ))
-        
-        return ProductListResponse(
-            products=product_responses,
-            total=total_count,
-            page=page,
-            per_page=per_page,
-            total_pages=total_pages
-        )
+        return json_response({
+            "products": rows_as_dicts(products, PRODUCT_FIELDS),
+            "total": total_count,
+            "page": page if cursor is None else None,
+            "per_page": per_page,
+            "total_pages": total_pages,
+            "next_cursor": next_cursor
+        })
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -144,7 +202,7 @@ async def get_product_endpoint(
     admin_user: dict = Depends(verify_admin)
 ):
     """Get product details by ID (Admin only)"""
-    product = get_product_by_id(product_id)
+    product = await get_product_by_id_async(product_id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -171,7 +229,7 @@ async def update_product_endpoint(
 ):
     """Update product by ID (Admin only)"""
     # Check if product exists
-    existing_product = get_product_by_id(product_id)
+    existing_product = await get_product_by_id_async(product_id)
     if not existing_product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -180,7 +238,7 @@ async def update_product_endpoint(
     
     try:
         # Update product
-        success = update_product(
+        success = await update_product_async(
             product_id=product_id,
             name=product_update.name,
             description=product_update.description,
@@ -197,7 +255,7 @@ async def update_product_endpoint(
             )
         
         # Get the updated product
-        updated_product = get_product_by_id(product_id)
+        updated_product = await get_product_by_id_async(product_id)
         return ProductResponse(
             id=updated_product[0],
             name=updated_product[1],
@@ -222,7 +280,7 @@ async def delete_product_endpoint(
 ):
     """Delete product by ID (Admin only)"""
     # Check if product exists
-    existing_product = get_product_by_id(product_id)
+    existing_product = await get_product_by_id_async(product_id)
     if not existing_product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -230,7 +288,7 @@ async def delete_product_endpoint(
         )
     
     try:
-        success = delete_product(product_id)
+        success = await delete_product_async(product_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -1,7 +1,75 @@
+import base64
+import json
+import math
+import re
 import sqlite3
 from datetime import datetime
-from typing import Optional, List, Tuple
-from core.database import get_database_connection
+from typing import Any, Optional, List, Tuple
+from core.cache import TTLCache
+from core.config import settings
+from core.database import database_connection, awaitable, run_in_db_executor
+
+# Largest value SQLite can store in an INTEGER column
+SQLITE_MAX_INTEGER = 2 ** 63 - 1
+
+# Listing totals keyed by catalog generation and normalized filters
+_count_cache = TTLCache("product_counts", settings.PRODUCT_COUNT_CACHE_SIZE, ttl=settings.PRODUCT_COUNT_CACHE_TTL_SECONDS)
+# Product rows by id (None for unknown ids); every write path invalidates its rows
+_product_cache = TTLCache("products", settings.PRODUCT_CACHE_SIZE, ttl=settings.PRODUCT_CACHE_TTL_SECONDS)
+
+_PHRASE = re.compile(r'"([^"]*)"')
+_TERM = re.compile(r'(\w+)(\*?)')
+
+def build_fts_query(keyword: str) -> Optional[str]:
+    """Turn user input into a safe FTS5 MATCH expression.
+
+    Quoted text becomes a phrase query and other words become terms that
+    must all match. ``word*`` is a prefix query, and the last bare word is
+    always treated as a prefix so partially typed searches find results.
+    FTS5 operators and punctuation are never passed through. Returns None
+    when the input has no searchable words.
+    """
+    clauses = []
+    for phrase in _PHRASE.findall(keyword):
+        words = re.findall(r'\w+', phrase)
+        if words:
+            clauses.append('"' + ' '.join(words) + '"')
+    terms = _TERM.findall(_PHRASE.sub(' ', keyword))
+    for index, (word, star) in enumerate(terms):
+        prefix = star or index == len(terms) - 1
+        clauses.append(f'"{word}"' + ('*' if prefix else ''))
+    return ' '.join(clauses) or None
+
+# Listing sort orders: column, direction and position of the key in a product row.
+# Every order ends with id so keyset cursors have a unique position.
+SORT_ORDERS = {
+    "created_at": ("DESC", 7),
+    "name": ("ASC", 1),
+    "price": ("ASC", 3),
+}
+
+def encode_cursor(sort_by: str, row: Tuple) -> str:
+    """Return an opaque cursor pointing just past ``row`` in the ``sort_by`` order"""
+    payload = json.dumps([sort_by, row[SORT_ORDERS[sort_by][1]], row[0]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort_by: str) -> Tuple[Any, int]:
+    """Return the ``(sort key, id)`` a cursor points past; raise ValueError if it is invalid"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, key, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort_by:
+        raise ValueError("Cursor does not match sort_by")
+    expected = (int, float) if sort_by == "price" else str
+    if not isinstance(last_id, int) or not isinstance(key, expected) or isinstance(key, bool):
+        raise ValueError("Invalid cursor")
+    return key, last_id
+
+def _keyset_condition(sort_by: str) -> str:
+    direction = SORT_ORDERS[sort_by][0]
+    return f"({sort_by}, id) {'<' if direction == 'DESC' else '>'} (?, ?)"
 
 def init_products_db():
     """Initialize the products database table"""
@@ -23,34 +91,46 @@ def create_product(
     if stock < 0:
         raise ValueError("Stock cannot be negative")
     
-    conn = get_database_connection()
-    cursor = conn.cursor()
+    with database_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute('''
-        INSERT INTO products (name, description, price, stock, category, image_url)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (name, description, price, stock, category, image_url))
+        cursor.execute('''
+            INSERT INTO products (name, description, price, stock, category, image_url)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (name, description, price, stock, category, image_url))
     
-    product_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+        product_id = cursor.lastrowid
+        conn.commit()
     
+    # The id may have been cached as unknown
+    invalidate_cached_product(product_id)
     return product_id
 
-def get_products(limit: int = 10, offset: int = 0) -> List[Tuple]:
-    """Get products with pagination"""
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT id, name, description, price, stock, category, image_url, created_at, updated_at
-        FROM products
-        ORDER BY created_at DESC
-        LIMIT ? OFFSET ?
-    ''', (limit, offset))
-    
-    products = cursor.fetchall()
-    conn.close()
+def get_products(limit: int = 10, offset: int = 0, after: Optional[Tuple[Any, int]] = None) -> List[Tuple]:
+    """Get products with pagination, newest first.
+
+    Pass ``after`` (a decoded cursor) to seek past a row instead of skipping
+    ``offset`` rows.
+    """
+    with database_connection() as conn:
+        cursor = conn.cursor()
+    
+        where_clause = ""
+        params = []
+        if after is not None:
+            where_clause = "WHERE " + _keyset_condition("created_at")
+            params.extend(after)
+            offset = 0
+    
+        cursor.execute(f'''
+            SELECT id, name, description, price, stock, category, image_url, created_at, updated_at
+            FROM products
+            {where_clause}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ? OFFSET ?
+        ''', (*params, limit, offset))
+    
+        products = cursor.fetchall()
     
     return products
 
@@ -60,55 +140,67 @@ def get_products_filtered(
     max_price: Optional[float] = None,
     sort_by: str = "created_at",
     limit: int = 10,
-    offset: int = 0
+    offset: int = 0,
+    after: Optional[Tuple[Any, int]] = None
 ) -> List[Tuple]:
-    """Get products with filters and sorting"""
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    
-    # Build WHERE clause
-    where_conditions = []
-    params = []
-    
-    if category:
-        where_conditions.append("category = ?")
-        params.append(category)
-    
-    if min_price is not None:
-        where_conditions.append("price >= ?")
-        params.append(min_price)
-    
-    if max_price is not None:
-        where_conditions.append("price <= ?")
-        params.append(max_price)
-    
-    where_clause = ""
-    if where_conditions:
-        where_clause = "WHERE " + " AND ".join(where_conditions)
-    
-    # Validate sort_by parameter
-    valid_sort_fields = ["name", "price", "created_at"]
-    if sort_by not in valid_sort_fields:
-        sort_by = "created_at"
-    
-    # Build ORDER BY clause
-    order_clause = f"ORDER BY {sort_by}"
-    if sort_by == "created_at":
-        order_clause += " DESC"
-    
-    query = f'''
-        SELECT id, name, description, price, stock, category, image_url, created_at, updated_at
-        FROM products
-        {where_clause}
-        {order_clause}
-        LIMIT ? OFFSET ?
-    '''
-    
-    params.extend([limit, offset])
-    cursor.execute(query, params)
-    
-    products = cursor.fetchall()
-    conn.close()
+    """Get products with filters and sorting.
+
+    Pass ``after`` (a decoded cursor) to seek past a row instead of skipping
+    ``offset`` rows.
+    """
+    with database_connection() as conn:
+        cursor = conn.cursor()
+    
+        # Build WHERE clause
+        where_conditions = []
+        params = []
+    
+        if category:
+            where_conditions.append("category = ?")
+            params.append(category)
+    
+        # Validate sort_by parameter
+        if sort_by not in SORT_ORDERS:
+            sort_by = "created_at"
+    
+        # Unless sorting by price, keep the price range off idx_products_price
+        # ("+price"): walking the sort index stops after one page, while the
+        # range scan would sort every product in the range first
+        price_column = "price" if sort_by == "price" else "+price"
+    
+        if min_price is not None:
+            where_conditions.append(f"{price_column} >= ?")
+            params.append(min_price)
+    
+        if max_price is not None:
+            where_conditions.append(f"{price_column} <= ?")
+            params.append(max_price)
+        direction = SORT_ORDERS[sort_by][0]
+    
+        if after is not None:
+            where_conditions.append(_keyset_condition(sort_by))
+            params.extend(after)
+            offset = 0
+    
+        where_clause = ""
+        if where_conditions:
+            where_clause = "WHERE " + " AND ".join(where_conditions)
+    
+        # Build ORDER BY clause; id breaks ties so pages never overlap
+        order_clause = f"ORDER BY {sort_by} {direction}, id {direction}"
+    
+        query = f'''
+            SELECT id, name, description, price, stock, category, image_url, created_at, updated_at
+            FROM products
+            {where_clause}
+            {order_clause}
+            LIMIT ? OFFSET ?
+        '''
+    
+        params.extend([limit, offset])
+        cursor.execute(query, params)
+    
+        products = cursor.fetchall()
     
     return products
 
@@ -117,41 +209,54 @@ def search_products(
     limit: int = 10,
     offset: int = 0
 ) -> List[Tuple]:
-    """Search products by keyword in name and description"""
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    
-    search_pattern = f"%{keyword}%"
+    """Search products by name, description and category, best matches first"""
+    query = build_fts_query(keyword)
+    if query is None:
+        return []
+
+    with database_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute('''
-        SELECT id, name, description, price, stock, category, image_url, created_at, updated_at
-        FROM products
-        WHERE name LIKE ? OR description LIKE ?
-        ORDER BY created_at DESC
-        LIMIT ? OFFSET ?
-    ''', (search_pattern, search_pattern, limit, offset))
+        # rank is bm25() with the column weights set in the products_fts migration
+        cursor.execute('''
+            SELECT p.id, p.name, p.description, p.price, p.stock, p.category, p.image_url, p.created_at, p.updated_at
+            FROM products_fts
+            JOIN products p ON p.id = products_fts.rowid
+            WHERE products_fts MATCH ?
+            ORDER BY products_fts.rank, p.id
+            LIMIT ? OFFSET ?
+        ''', (query, limit, offset))
     
-    products = cursor.fetchall()
-    conn.close()
+        products = cursor.fetchall()
     
     return products
 
-def get_product_by_id(product_id: int) -> Optional[Tuple]:
-    """Get product by ID"""
-    conn = get_database_connection()
-    cursor = conn.cursor()
+def _fetch_product(product_id: int) -> Optional[Tuple]:
+    with database_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute('''
-        SELECT id, name, description, price, stock, category, image_url, created_at, updated_at
-        FROM products
-        WHERE id = ?
-    ''', (product_id,))
+        cursor.execute('''
+            SELECT id, name, description, price, stock, category, image_url, created_at, updated_at
+            FROM products
+            WHERE id = ?
+        ''', (product_id,))
     
-    product = cursor.fetchone()
-    conn.close()
+        product = cursor.fetchone()
     
     return product
 
+def get_product_by_id(product_id: int) -> Optional[Tuple]:
+    """Get product by ID (cached; concurrent misses share one query)"""
+    return _product_cache.get_or_load(product_id, lambda: _fetch_product(product_id))
+
+def invalidate_cached_product(product_id: int) -> None:
+    """Drop a product from the cache after a committed write"""
+    _product_cache.delete(product_id)
+
+def invalidate_product_cache() -> None:
+    """Drop every cached product after a committed bulk write"""
+    _product_cache.clear()
+
 def update_product(
     product_id: int,
     name: Optional[str] = None,
@@ -199,81 +304,266 @@ def update_product(
     
     params.append(product_id)
     
-    conn = get_database_connection()
-    cursor = conn.cursor()
+    with database_connection() as conn:
+        cursor = conn.cursor()
     
-    query = f"UPDATE products SET {', '.join(update_fields)} WHERE id = ?"
-    cursor.execute(query, params)
+        query = f"UPDATE products SET {', '.join(update_fields)} WHERE id = ?"
+        cursor.execute(query, params)
     
-    success = cursor.rowcount > 0
-    conn.commit()
-    conn.close()
+        success = cursor.rowcount > 0
+        conn.commit()
     
+    invalidate_cached_product(product_id)
     return success
 
+def apply_inventory_updates(updates: List[dict]) -> dict:
+    """Apply a batch of stock and price changes in one transaction.
+
+    Each update names a product ``id`` and sets ``stock`` or adjusts it by
+    ``stock_delta``, and/or sets ``price``. The batch is applied in order
+    under the write lock, so deltas never race other writers and repeated
+    ids build on each other. Returns the products that changed with their
+    new values and the updates that failed; updates that leave a product as
+    it was are only counted.
+    """
+    failed = []
+    valid = []
+    for index, update in enumerate(updates):
+        product_id = update.get("id")
+        stock, stock_delta, price = update.get("stock"), update.get("stock_delta"), update.get("price")
+        if stock is not None and stock_delta is not None:
+            detail = "Set either stock or stock_delta, not both"
+        elif stock is None and stock_delta is None and price is None:
+            detail = "Nothing to update"
+        elif not 0 < product_id <= SQLITE_MAX_INTEGER:
+            detail = "Product not found"
+        elif stock is not None and stock < 0:
+            detail = "Stock cannot be negative"
+        elif (stock is not None and stock > SQLITE_MAX_INTEGER) or (
+            stock_delta is not None and abs(stock_delta) > SQLITE_MAX_INTEGER
+        ):
+            detail = "Stock out of range"
+        elif price is not None and not math.isfinite(price):
+            detail = "Price must be a finite number"
+        elif price is not None and price < 0:
+            detail = "Price cannot be negative"
+        else:
+            valid.append((index, product_id, stock, stock_delta, price))
+            continue
+        failed.append({"index": index, "id": product_id, "detail": detail})
+
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+
+        current = {}
+        ids = list({product_id for _, product_id, _, _, _ in valid})
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            cursor.execute(
+                f'SELECT id, stock, price FROM products WHERE id IN ({", ".join("?" * len(batch))})',
+                batch
+            )
+            current.update((row[0], [row[1], row[2]]) for row in cursor.fetchall())
+
+        changed = {}
+        unchanged = 0
+        for index, product_id, stock, stock_delta, price in valid:
+            state = current.get(product_id)
+            if state is None:
+                failed.append({"index": index, "id": product_id, "detail": "Product not found"})
+                continue
+            new_stock = stock if stock is not None else state[0] + (stock_delta or 0)
+            if new_stock < 0:
+                failed.append({"index": index, "id": product_id, "detail": "Stock cannot be negative"})
+                continue
+            if new_stock > SQLITE_MAX_INTEGER:
+                failed.append({"index": index, "id": product_id, "detail": "Stock out of range"})
+                continue
+            new_price = price if price is not None else state[1]
+            if [new_stock, new_price] == state:
+                unchanged += 1
+                continue
+            state[0], state[1] = new_stock, new_price
+            changed[product_id] = state
+
+        # Setting updated_at here spares the timestamp trigger's second UPDATE
+        cursor.executemany(
+            "UPDATE products SET stock = ?, price = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            [(stock, price, product_id) for product_id, (stock, price) in changed.items()]
+        )
+        conn.commit()
+
+    for product_id in changed:
+        invalidate_cached_product(product_id)
+    failed.sort(key=lambda failure: failure["index"])
+    return {
+        "received": len(updates),
+        "changed": [
+            {"id": product_id, "stock": stock, "price": price}
+            for product_id, (stock, price) in changed.items()
+        ],
+        "unchanged": unchanged,
+        "failed": failed
+    }
+
 def delete_product(product_id: int) -> bool:
     """Delete product by ID"""
-    conn = get_database_connection()
-    cursor = conn.cursor()
+    with database_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute("DELETE FROM products WHERE id = ?", (product_id,))
+        cursor.execute("DELETE FROM products WHERE id = ?", (product_id,))
     
-    success = cursor.rowcount > 0
-    conn.commit()
-    conn.close()
+        success = cursor.rowcount > 0
+        conn.commit()
     
+    invalidate_cached_product(product_id)
     return success
 
-def get_total_products_count() -> int:
-    """Get total count of products"""
-    conn = get_database_connection()
-    cursor = conn.cursor()
+def get_catalog_generation(cursor: sqlite3.Cursor) -> int:
+    """Return the catalog generation, bumped by triggers on every product write"""
+    cursor.execute("SELECT generation FROM catalog_state WHERE id = 1")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def get_catalog_version() -> Tuple[int, Optional[str]]:
+    """Return the catalog generation and the time of the last product write"""
+    with database_connection() as conn:
+        cursor = conn.cursor()
     
-    cursor.execute("SELECT COUNT(*) FROM products")
-    count = cursor.fetchone()[0]
-    conn.close()
+        cursor.execute("SELECT generation, updated_at FROM catalog_state WHERE id = 1")
+        row = cursor.fetchone()
     
+    return (row[0], row[1]) if row else (0, None)
+
+def get_total_products_count() -> int:
+    """Get total count of products"""
+    return get_total_products_count_filtered()
+
+def _count_filters(
+    category: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    search_keyword: Optional[str]
+) -> Tuple[Optional[str], Optional[tuple]]:
+    """Return the FTS match expression and the count cache key (None if nothing can match)"""
+    match = None
+    if search_keyword:
+        match = build_fts_query(search_keyword)
+        if match is None:
+            return None, None
+    return match, (
+        category or None,
+        float(min_price) if min_price is not None else None,
+        float(max_price) if max_price is not None else None,
+        match.lower() if match else None,
+    )
+
+def _count_products(
+    category: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    match: Optional[str],
+    key: tuple,
+    generation: Optional[int]
+) -> int:
+    with database_connection() as conn:
+        cursor = conn.cursor()
+    
+        if generation is None:
+            # Read the generation before counting: a write in between can only
+            # make the cached entry stale early, never serve an outdated count.
+            # Entries from older generations are never hit again and age out.
+            generation = get_catalog_generation(cursor)
+            count = _count_cache.get((generation,) + key)
+            if count is not None:
+                return count
+        key = (generation,) + key
+    
+        # Build WHERE clause
+        where_conditions = []
+        params = []
+    
+        if category:
+            where_conditions.append("category = ?")
+            params.append(category)
+    
+        if min_price is not None:
+            where_conditions.append("price >= ?")
+            params.append(min_price)
+    
+        if max_price is not None:
+            where_conditions.append("price <= ?")
+            params.append(max_price)
+    
+        if match and not where_conditions:
+            # Counting the index alone never touches the products table
+            cursor.execute("SELECT COUNT(*) FROM products_fts WHERE products_fts MATCH ?", (match,))
+        else:
+            if match:
+                where_conditions.append("id IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)")
+                params.append(match)
+    
+            where_clause = ""
+            if where_conditions:
+                where_clause = "WHERE " + " AND ".join(where_conditions)
+    
+            query = f"SELECT COUNT(*) FROM products {where_clause}"
+            cursor.execute(query, params)
+    
+        count = cursor.fetchone()[0]
+    
+    _count_cache.set(key, count)
     return count
 
 def get_total_products_count_filtered(
     category: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
-    search_keyword: Optional[str] = None
+    search_keyword: Optional[str] = None,
+    generation: Optional[int] = None
 ) -> int:
-    """Get total count of products with filters"""
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    
-    # Build WHERE clause
-    where_conditions = []
-    params = []
-    
-    if category:
-        where_conditions.append("category = ?")
-        params.append(category)
-    
-    if min_price is not None:
-        where_conditions.append("price >= ?")
-        params.append(min_price)
-    
-    if max_price is not None:
-        where_conditions.append("price <= ?")
-        params.append(max_price)
-    
-    if search_keyword:
-        search_pattern = f"%{search_keyword}%"
-        where_conditions.append("(name LIKE ? OR description LIKE ?)")
-        params.extend([search_pattern, search_pattern])
-    
-    where_clause = ""
-    if where_conditions:
-        where_clause = "WHERE " + " AND ".join(where_conditions)
-    
-    query = f"SELECT COUNT(*) FROM products {where_clause}"
-    cursor.execute(query, params)
-    
-    count = cursor.fetchone()[0]
-    conn.close()
-    
-    return count
\ No newline at end of file
+    """Get total count of products with filters.
+
+    Counts are cached per filter signature and catalog generation, so any
+    product write makes them stale. Callers that already read the catalog
+    generation for an ETag pass it in, so a cached count costs no
+    connection.
+    """
+    match, key = _count_filters(category, min_price, max_price, search_keyword)
+    if key is None:
+        return 0
+    if generation is not None:
+        count = _count_cache.get((generation,) + key)
+        if count is not None:
+            return count
+    return _count_products(category, min_price, max_price, match, key, generation)
+
+async def get_total_products_count_filtered_async(
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    search_keyword: Optional[str] = None,
+    generation: Optional[int] = None
+) -> int:
+    """Get the filtered count; a cached count for a known generation skips the database executor"""
+    match, key = _count_filters(category, min_price, max_price, search_keyword)
+    if key is None:
+        return 0
+    if generation is not None:
+        count = _count_cache.get((generation,) + key)
+        if count is not None:
+            return count
+    return await run_in_db_executor(_count_products, category, min_price, max_price, match, key, generation)
+
+# Awaitable variants for the async route handlers
+create_product_async = awaitable(create_product)
+get_products_async = awaitable(get_products)
+get_products_filtered_async = awaitable(get_products_filtered)
+search_products_async = awaitable(search_products)
+get_product_by_id_async = awaitable(get_product_by_id)
+update_product_async = awaitable(update_product)
+delete_product_async = awaitable(delete_product)
+apply_inventory_updates_async = awaitable(apply_inventory_updates)
+get_catalog_version_async = awaitable(get_catalog_version)
+get_total_products_count_async = awaitable(get_total_products_count)
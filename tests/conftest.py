@@ -0,0 +1,20 @@
+import os
+import tempfile
+
+# Settings are read at import time: keep every test off the real database
+os.environ.setdefault("DATABASE_URL", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+import pytest
+from core.config import settings
+from core.database import close_pool, init_database
+
+@pytest.fixture
+def database(tmp_path):
+    """A freshly migrated database behind the global connection pool"""
+    previous = settings.DATABASE_URL
+    close_pool()
+    settings.DATABASE_URL = str(tmp_path / "test.db")
+    init_database()
+    yield settings.DATABASE_URL
+    close_pool()
+    settings.DATABASE_URL = previous
@@ -0,0 +1,41 @@
+"""Order cancellation restores stock on a single pooled connection."""
+from typing import Tuple
+from checkout.utils import cancel_order
+from core.database import ConnectionPool, database_connection
+from products.utils import create_product, get_product_by_id
+
+def place_order(product_id: int, quantity: int) -> Tuple[int, int]:
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (name, email, password) VALUES ('Ann', 'ann@example.com', 'x')")
+        user_id = cursor.lastrowid
+        cursor.execute(
+            "INSERT INTO orders (user_id, total_amount, shipping_address, payment_method) VALUES (?, 20, 'Here', 'card')",
+            (user_id,)
+        )
+        order_id = cursor.lastrowid
+        cursor.execute(
+            '''INSERT INTO order_items (order_id, product_id, product_name, product_price, quantity, subtotal)
+               VALUES (?, ?, 'Lamp', 10, ?, 20)''',
+            (order_id, product_id, quantity)
+        )
+        conn.commit()
+    return user_id, order_id
+
+def test_cancel_restores_stock_on_one_connection(database, monkeypatch):
+    product_id = create_product("Lamp", "Brass lamp", 10.0, 5, "home", None)
+    user_id, order_id = place_order(product_id, 2)
+    peak = []
+    acquire = ConnectionPool.acquire
+
+    def tracking_acquire(self):
+        conn = acquire(self)
+        peak.append(self.stats()["checked_out"])
+        return conn
+
+    monkeypatch.setattr(ConnectionPool, "acquire", tracking_acquire)
+
+    assert cancel_order(order_id, user_id)
+
+    assert max(peak) == 1
+    assert get_product_by_id(product_id)[4] == 7
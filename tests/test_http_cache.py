@@ -0,0 +1,21 @@
+import pytest
+from core.http_cache import accepts_encoding
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", True),
+    ("GZIP; Q=0.3", True),
+    ("x-gzip", True),
+    ("br, *;q=0.5", True),
+    ("*", True),
+    (None, False),
+    ("", False),
+    ("deflate", False),
+    ("gzip;q=0", False),
+    ("gzip;q=0.000", False),
+    ("identity, x-gzip;q=0", False),
+    ("*;q=0", False),
+    ("gzip;q=0, *", False),
+    ("gzip;q=invalid", False),
+])
+def test_accepts_gzip(header, expected):
+    assert accepts_encoding(header, "gzip") is expected
@@ -0,0 +1,21 @@
+"""Inventory batches report out-of-range entries instead of failing."""
+from products.utils import SQLITE_MAX_INTEGER, apply_inventory_updates, create_product, get_product_by_id
+
+def test_out_of_range_entries_are_reported_per_entry(database):
+    product_id = create_product("Lamp", "Brass lamp", 10.0, 5, "home", None)
+
+    result = apply_inventory_updates([
+        {"id": product_id, "stock": 10 ** 20},
+        {"id": 10 ** 20, "stock": 1},
+        {"id": product_id, "price": float("nan")},
+        {"id": product_id, "stock_delta": SQLITE_MAX_INTEGER},
+        {"id": product_id, "stock": 7},
+    ])
+
+    assert [(failure["index"], failure["detail"]) for failure in result["failed"]] == [
+        (0, "Stock out of range"),
+        (1, "Product not found"),
+        (2, "Price must be a finite number"),
+        (3, "Stock out of range"),
+    ]
+    assert get_product_by_id(product_id)[4] == 7
@@ -0,0 +1,147 @@
+"""Outbox delivery against a throwaway local SMTP server."""
+import socket
+import socketserver
+import threading
+import pytest
+from core import outbox
+from core.config import settings
+from core.database import database_connection
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """Minimal SMTP server: accepts everything except recipients containing 'reject'"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPStubHandler)
+        self.connections = 0
+        self.messages = []
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        recipients = []
+        self.reply("220 stub ready")
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 stub")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                if "reject" in command:
+                    self.reply("550 No such user")
+                else:
+                    recipients.append(command)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                for line in self.rfile:
+                    if line == b".\r\n":
+                        break
+                self.server.messages.extend(recipients)
+                self.reply("250 OK queued")
+            elif verb == "RSET":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Not implemented")
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+@pytest.fixture
+def smtp(database, monkeypatch):
+    server = SMTPStub()
+    monkeypatch.setattr(settings, "SMTP_SERVER", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", server.port)
+    monkeypatch.setattr(settings, "SMTP_USE_TLS", False)
+    monkeypatch.setattr(settings, "SMTP_USERNAME", "")
+    monkeypatch.setattr(outbox, "_sender", outbox.SMTPSender())
+    yield server
+    outbox._sender.close()
+    server.stop()
+
+def enqueue(*recipients: str) -> None:
+    with database_connection() as conn:
+        cursor = conn.cursor()
+        for recipient in recipients:
+            outbox.enqueue_email(cursor, recipient, "Subject", "Body")
+        conn.commit()
+
+def make_due() -> None:
+    with database_connection() as conn:
+        conn.execute("UPDATE email_outbox SET next_attempt_at = 0 WHERE status = 'pending'")
+        conn.commit()
+
+def outbox_rows() -> dict:
+    with database_connection() as conn:
+        rows = conn.execute(
+            "SELECT recipient, status, attempts, next_attempt_at, last_error FROM email_outbox"
+        ).fetchall()
+    return {row[0]: row[1:] for row in rows}
+
+def test_batch_is_delivered_over_one_connection(smtp):
+    recipients = [f"user{index}@example.com" for index in range(5)]
+    enqueue(*recipients)
+
+    assert outbox.deliver_pending_emails() == 5
+
+    assert smtp.connections == 1
+    assert len(smtp.messages) == 5
+    assert {status for status, *_ in outbox_rows().values()} == {"sent"}
+
+def test_unreachable_server_defers_batch_without_charging_attempts(smtp, monkeypatch):
+    enqueue("a@example.com", "b@example.com")
+    monkeypatch.setattr(settings, "SMTP_PORT", free_port())
+
+    assert outbox.deliver_pending_emails() == 0
+
+    for status, attempts, next_attempt_at, last_error in outbox_rows().values():
+        assert (status, attempts) == ("pending", 0)
+        assert next_attempt_at > 0
+        assert last_error
+    # Backed off: nothing is due until the retry time
+    assert outbox.deliver_pending_emails() == 0
+
+    monkeypatch.setattr(settings, "SMTP_PORT", smtp.port)
+    make_due()
+    assert outbox.deliver_pending_emails() == 2
+    assert {status for status, *_ in outbox_rows().values()} == {"sent"}
+
+def test_rejected_message_fails_after_max_attempts(smtp, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 3)
+    enqueue("reject@example.com", "ok@example.com")
+
+    assert outbox.deliver_pending_emails() == 1
+    for _ in range(2):
+        make_due()
+        outbox.deliver_pending_emails()
+
+    rows = outbox_rows()
+    status, attempts, _, last_error = rows["reject@example.com"]
+    assert (status, attempts) == ("failed", 3)
+    assert "No such user" in last_error
+    assert rows["ok@example.com"][0] == "sent"
+    # A rejection does not cost the shared connection
+    assert smtp.connections == 1
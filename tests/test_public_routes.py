@@ -0,0 +1,38 @@
+"""Database work done by warm public catalog requests."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from core.database import ConnectionPool
+from products import public_routes
+from products.utils import create_product
+
+@pytest.fixture
+def client(database):
+    app = FastAPI()
+    app.include_router(public_routes.router, prefix="/products")
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def checkouts(monkeypatch):
+    counter = []
+    acquire = ConnectionPool.acquire
+
+    def counting_acquire(self):
+        counter.append(1)
+        return acquire(self)
+
+    monkeypatch.setattr(ConnectionPool, "acquire", counting_acquire)
+    return counter
+
+@pytest.mark.parametrize("url", ["/products/?category=home", "/products/search?keyword=lamp"])
+def test_warm_listing_reuses_the_generation_for_its_total(client, checkouts, url):
+    create_product("Lamp", "Brass lamp", 10.0, 5, "home", None)
+    assert client.get(url).json()["total"] == 1
+    checkouts.clear()
+
+    response = client.get(url)
+
+    assert response.json()["total"] == 1
+    # Catalog version and the page itself; the total comes from the cache
+    assert len(checkouts) == 2
@@ -0,0 +1,60 @@
+"""The hot queries keep using their indexes on a fully migrated database."""
+import sqlite3
+import pytest
+from auth.utils import sweep_reset_tokens, validate_reset_token
+from cart.utils import get_cart_items
+from core.database import InstrumentedCursor
+from orders.utils import get_order_items, get_user_orders
+from products.utils import get_products_filtered
+
+@pytest.fixture
+def statements(database, monkeypatch):
+    """Record every statement the data access functions execute"""
+    captured = []
+    execute = InstrumentedCursor.execute
+
+    def recording_execute(self, sql, parameters=()):
+        captured.append((sql, parameters))
+        return execute(self, sql, parameters)
+
+    monkeypatch.setattr(InstrumentedCursor, "execute", recording_execute)
+    return captured
+
+def query_plan(database: str, sql: str, parameters) -> str:
+    conn = sqlite3.connect(database)
+    try:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+    finally:
+        conn.close()
+    return "\n".join(row[-1] for row in rows)
+
+@pytest.mark.parametrize("call, verb, index", [
+    (lambda: get_user_orders(1), "SELECT", "idx_orders_user_created"),
+    (lambda: get_order_items(1), "SELECT", "idx_order_items_order"),
+    (lambda: get_cart_items(1), "SELECT", "idx_cart_user_created"),
+    (lambda: get_products_filtered(sort_by="created_at"), "SELECT", "idx_products_created_at"),
+    (lambda: get_products_filtered(category="home", sort_by="price"), "SELECT", "idx_products_category_price"),
+    (lambda: get_products_filtered(category="home", sort_by="created_at"), "SELECT", "idx_products_category_created_at"),
+    # token_hash is UNIQUE, so its index is the one SQLite creates for the constraint
+    (lambda: validate_reset_token("token"), "UPDATE", "sqlite_autoindex_reset_tokens_1 (token_hash=?)"),
+], ids=[
+    "orders_by_user", "order_items", "cart_by_user", "by_created_at", "category_by_price",
+    "category_by_created_at", "reset_token_by_hash"
+])
+def test_query_uses_index(database, statements, call, verb, index):
+    call()
+    sql, parameters = [statement for statement in statements if statement[0].lstrip().upper().startswith(verb)][-1]
+
+    plan = query_plan(database, sql, parameters)
+
+    assert index in plan, plan
+
+def test_reset_token_sweep_uses_indexes(database, statements):
+    sweep_reset_tokens()
+    deletes = [statement for statement in statements if statement[0].lstrip().upper().startswith("DELETE")]
+
+    plans = [query_plan(database, sql, parameters) for sql, parameters in deletes]
+
+    assert len(plans) == 2
+    assert "idx_reset_tokens_used" in plans[0], plans[0]
+    assert "idx_reset_tokens_expires" in plans[1], plans[1]
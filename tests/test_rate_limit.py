@@ -0,0 +1,24 @@
+"""Token bucket limiter behaviour that does not depend on the clock."""
+from auth.rate_limit import TokenBucketLimiter
+
+def test_eviction_drops_least_recently_used_bucket():
+    # No refill, so the compaction pass never frees anything and eviction decides
+    limiter = TokenBucketLimiter("test", burst=100, per_minute=0, max_keys=10)
+    for index in range(10):
+        limiter.acquire(f"key{index}")
+    limiter.acquire("key0")  # the oldest bucket is still in use
+
+    limiter.acquire("new")
+
+    assert "key0" in limiter._buckets
+    assert "key1" not in limiter._buckets
+    assert "new" in limiter._buckets
+
+def test_bucket_state_survives_while_in_use():
+    limiter = TokenBucketLimiter("test", burst=2, per_minute=0, max_keys=4)
+    assert limiter.acquire("busy") == 0
+    for index in range(8):
+        limiter.acquire(f"other{index}")
+        limiter.acquire("busy")
+
+    assert limiter.acquire("busy") > 0
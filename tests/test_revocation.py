@@ -0,0 +1,37 @@
+"""Every worker's Bloom filter forgets pruned revocations."""
+import time
+from auth.revocation import RevocationList, _record, prune_expired_tokens
+from core.database import database_connection
+
+def revoke(key: str, expires_at: float) -> None:
+    with database_connection() as conn:
+        _record(conn.cursor(), key, expires_at)
+        conn.commit()
+
+def test_filter_is_rebuilt_after_another_worker_prunes(database):
+    revoke("expired-jti", time.time() - 60)
+    revoke("live-jti", time.time() + 3600)
+    other_worker = RevocationList()
+    other_worker.sync()
+    assert other_worker.might_be_revoked({"jti": "expired-jti"})
+
+    # The rows are deleted by this process, not by other_worker
+    prune_expired_tokens()
+
+    assert other_worker.rebuild_if_pruned()
+    assert not other_worker.might_be_revoked({"jti": "expired-jti"})
+    assert other_worker.might_be_revoked({"jti": "live-jti"})
+    assert not other_worker.rebuild_if_pruned()
+
+def test_new_rows_do_not_hide_a_prune(database):
+    revoke("expired-jti", time.time() - 60)
+    worker = RevocationList()
+    worker.sync()
+    with database_connection() as conn:
+        conn.execute("DELETE FROM revoked_tokens")
+        conn.commit()
+    revoke("fresh-jti", time.time() + 3600)
+
+    assert worker.rebuild_if_pruned()
+    assert not worker.might_be_revoked({"jti": "expired-jti"})
+    assert worker.might_be_revoked({"jti": "fresh-jti"})
@@ -0,0 +1,38 @@
+"""Bulk user import reports bad rows instead of aborting."""
+import io
+import pytest
+from auth import passwords
+from auth.bulk_import import import_users
+from core.config import settings
+from core.database import database_connection
+
+@pytest.fixture
+def password_pool(monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 1)
+    yield
+    passwords.shutdown_password_pool()
+
+def test_overlong_password_is_a_row_error(database, password_pool):
+    text = io.StringIO(
+        "name,email,password\n"
+        "Ann,ann@example.com,secret1\n"
+        f"Bob,bob@example.com,{'x' * 73}\n"
+        "Cid,cid@example.com,secret3\n"
+    )
+
+    report = import_users(text, "csv")
+
+    assert (report["imported"], report["errors"]) == (2, 1)
+    assert report["issues"][0]["line"] == 3
+    assert "72 bytes" in report["issues"][0]["detail"]
+    with database_connection() as conn:
+        emails = {row[0] for row in conn.execute("SELECT email FROM users").fetchall()}
+    assert {"ann@example.com", "cid@example.com"} <= emails
+    assert "bob@example.com" not in emails
+
+def test_failed_hash_is_returned_in_place(password_pool):
+    hashes = passwords.hash_passwords(["short", "x" * 73])
+
+    assert passwords.verify_password("short", hashes[0])
+    assert isinstance(hashes[1], ValueError)